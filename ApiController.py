@@ -1,42 +1,453 @@
-import requests
+import time, random, threading, json, os, re, math, sqlite3, unicodedata
+from difflib import SequenceMatcher
+from urllib.parse import urlencode
+import Instrumentation
+
+API_URL = "https://api.themoviedb.org/3"
+IMAGE_URL = "https://image.tmdb.org/t/p"
+RATE_LIMIT = 40  # requests per second, TMDB allows around 50
+MAX_RETRIES = 5
+TIMEOUT = 10
+POOL_SIZE = 16
+CACHE_FILE = "api_cache.db"  # next to the catalog, misses are a table in it too
+CACHE_TTL = 7 * 24 * 60 * 60
+CACHE_SIZE = 20000
+# only what Movie and the candidate ranking read is cached
+SEARCH_FIELDS = (
+    "id",
+    "title",
+    "original_title",
+    "release_date",
+    "popularity",
+    "genre_ids",
+    "poster_path",
+)
+CREW_JOBS = ("Director", "Screenplay", "Dialogue")
+CAST_SIZE = 5  # Movie keeps the first five billed
+MISSES_TTL = 3 * 24 * 60 * 60  # titles that weren't found are retried after this
+SEARCH_PAGES = 3  # more pages are only fetched while nothing matches well
+MIN_SIMILARITY = 0.6
+SURE_SIMILARITY = 0.95
+YEAR_TOLERANCE = 1
+POSTER_SIZE = "w185"  # tmdb sizes: w92, w154, w185, w342, w500, w780, original
+CHUNK_SIZE = 64 * 1024
+GENRES = {  # tmdb's movie genre ids, they don't change
+    28: "Action",
+    12: "Adventure",
+    16: "Animation",
+    35: "Comedy",
+    80: "Crime",
+    99: "Documentary",
+    18: "Drama",
+    10751: "Family",
+    14: "Fantasy",
+    36: "History",
+    27: "Horror",
+    10402: "Music",
+    9648: "Mystery",
+    10749: "Romance",
+    878: "Science Fiction",
+    10770: "TV Movie",
+    53: "Thriller",
+    10752: "War",
+    37: "Western",
+}
+
+
+class RateLimiter:
+    # token bucket shared by every thread talking to the api
+    def __init__(self, rate=RATE_LIMIT, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResponseCache:
+    # endpoint+params : json data in sqlite, every entry is written as it
+    # comes. Entries older than ttl are misses, past max_size the oldest go
+    def __init__(
+        self, path=CACHE_FILE, ttl=CACHE_TTL, max_size=CACHE_SIZE, table="responses"
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.table = table
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, ts REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_ts ON {table}(ts)")
+        self.size = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    @staticmethod
+    def make_key(endpoint, params=None):
+        return f"{endpoint}?{urlencode(sorted((params or {}).items()))}"
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT ts, value FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[0] > self.ttl:
+                with self.conn:
+                    self.conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self.size -= 1
+                return None
+        return json.loads(row[1])
+
+    def set(self, key, data):
+        value = json.dumps(data, ensure_ascii=False)
+        with self.lock, self.conn:
+            known = self.conn.execute(
+                f"SELECT 1 FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            self.conn.execute(
+                f"INSERT INTO {self.table} (key, ts, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET ts = excluded.ts, value = excluded.value",
+                (key, time.time(), value),
+            )
+            self.size += known is None
+            if self.size > self.max_size:
+                self.conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY ts LIMIT ?)",
+                    (self.size - self.max_size,),
+                )
+                self.size = self.max_size
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute(f"DELETE FROM {self.table}")
+            self.size = 0
+
+
+def _trim_search(data):
+    # what ranking the candidates and Movie need of a search page
+    return {
+        "total_pages": data.get("total_pages", 1),
+        "results": [
+            {field: movie.get(field) for field in SEARCH_FIELDS}
+            for movie in data.get("results", [])
+        ],
+    }
+
+
+def _trim_credits(credits):
+    # directors and writers, and the top billed cast Movie keeps
+    return {
+        "crew": [
+            {"job": person["job"], "name": person["name"]}
+            for person in credits.get("crew", [])
+            if person.get("job") in CREW_JOBS
+        ],
+        "cast": [
+            {field: person.get(field) for field in ("name", "character", "order", "gender")}
+            for person in credits.get("cast", [])[:CAST_SIZE]
+        ],
+    }
+
+
+def _trim_details(data):
+    trimmed = {"id": data.get("id"), "imdb_id": data.get("imdb_id")}
+    if "credits" in data:
+        trimmed["credits"] = _trim_credits(data["credits"])
+    if "external_ids" in data:
+        trimmed["external_ids"] = {"imdb_id": data["external_ids"].get("imdb_id")}
+    return trimmed
+
+
+def normalize_title(title):
+    # lowercase ascii words, so "Amélie" matches "Amelie" and "&" matches "and".
+    # Titles with no ascii letters at all, e.g. "七人の侍", are only casefolded
+    folded = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode()
+    folded = folded.lower().replace("&", " and ")
+    words = re.findall(r"[a-z0-9]+", folded)
+    if not words:
+        return " ".join(title.casefold().split())
+    return " ".join(words)
+
+
+def _contains_words(a, b):
+    # one title is the other's start, end or middle, on word boundaries
+    return f" {a} " in f" {b} " or f" {b} " in f" {a} "
+
+
+def score_candidate(title, year, candidate):
+    # None when the candidate can't be the movie, else higher is better
+    names = {candidate.get("title") or "", candidate.get("original_title") or ""}
+    names.discard("")
+    if not title or not names:
+        return None  # two empty titles would be a perfect match
+    names = [normalize_title(name) for name in names]
+    similarity = max(SequenceMatcher(None, title, name).ratio() for name in names)
+    release_year = (candidate.get("release_date") or "")[:4]
+    if similarity < MIN_SIMILARITY:
+        # folders often carry a short form, "Birdman" for "Birdman or (The
+        # Unexpected Virtue of Ignorance)". Only taken with the same year
+        if release_year != str(year) or not any(
+            _contains_words(title, name) for name in names
+        ):
+            return None
+        similarity = MIN_SIMILARITY
+    if isinstance(year, int) and release_year.isdigit():
+        distance = abs(int(release_year) - year)
+        if distance > YEAR_TOLERANCE:
+            return None
+        year_score = 1.0 if distance == 0 else 0.5
+    elif isinstance(year, int):
+        return None  # no release date to compare with
+    else:
+        year_score = 0.5
+    popularity = min(1.0, math.log10(1 + (candidate.get("popularity") or 0)) / 3)
+    return 0.6 * similarity + 0.3 * year_score + 0.1 * popularity, similarity, year_score
+
+
+class ApiClient:
+    def __init__(
+        self, api_key=None, cache=None, limiter=None, adapter=None, misses=None
+    ):
+        # adapter replaces the network, see Transport for record and replay.
+        # requests is only imported once a client is needed, scans and queries
+        # never pay for it
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.api_key = api_key or get_api_key()
+        self.cache = cache if cache is not None else ResponseCache()
+        # searches that found nothing, kept for a shorter time than the answers
+        self.misses = (
+            misses
+            if misses is not None
+            else ResponseCache(ttl=MISSES_TTL, table="misses")
+        )
+        self.limiter = limiter or RateLimiter()
+        self.session = requests.Session()
+        adapter = adapter or HTTPAdapter(pool_connections=2, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+
+    def get_movie_info(self, title, year):
+        # the best ranked result, more pages only while nothing is a sure match
+        miss_key = ResponseCache.make_key("/search/movie", {"query": title, "year": year})
+        if self.misses.get(miss_key):
+            Instrumentation.count("search miss cached")
+            return None
+        wanted = normalize_title(title)
+        best, answered, candidates = None, False, 0
+        for page in range(1, SEARCH_PAGES + 1):
+            params = {"include_adult": "true", "query": title}
+            if page > 1:
+                params["page"] = page
+            data = self._get_json("/search/movie", params, trim=_trim_search)
+            if not data:
+                break
+            answered = True
+            candidates += len(data.get("results", []))
+            for movie in data.get("results", []):
+                score = score_candidate(wanted, year, movie)
+                if score is not None and (best is None or score > best[0]):
+                    best = (score, movie)
+            if best and best[0][1] >= SURE_SIMILARITY and best[0][2] == 1.0:
+                break
+            if page >= data.get("total_pages", 1):
+                break
+        if best is None:
+            # errors are not misses, neither are results that scored too low,
+            # a better parse of the name may match them later
+            if answered and not candidates:
+                self.misses.set(miss_key, True)
+                Instrumentation.count("search not found")
+            return None
+        return best[1]
+
+    def get_cast_info(self, id):
+        return self._get_json(f"/movie/{id}/credits", trim=_trim_credits)
+
+    def get_movie_details(self, movie_id):
+        # credits and external ids in the same round trip
+        return self._get_json(
+            f"/movie/{movie_id}",
+            {"append_to_response": "credits,external_ids"},
+            trim=_trim_details,
+        )
+
+    def download_poster(self, poster_path, dest, size=POSTER_SIZE, validators=None):
+        # streams the poster into dest. Returns the etag and last-modified to
+        # send next time, the old ones when it didn't change, None on failure
+        headers = {}
+        if validators and validators.get("size") == size and os.path.exists(dest):
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("modified"):
+                headers["If-Modified-Since"] = validators["modified"]
+        response = self._get(
+            f"{IMAGE_URL}/{size}{poster_path}", headers=headers, stream=True
+        )
+        with response:
+            if response.status_code == 304:
+                return validators
+            if response.status_code != 200:
+                return None
+            tmp_path = f"{dest}.part"
+            try:
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                os.replace(tmp_path, dest)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            return {
+                "size": size,
+                "etag": response.headers.get("ETag"),
+                "modified": response.headers.get("Last-Modified"),
+            }
+
+    def get_imdb_id(self, movie_id):
+        data = self._get_json(
+            f"/movie/{movie_id}/external_ids", trim=lambda data: {"imdb_id": data.get("imdb_id")}
+        )
+        if data:
+            return data["imdb_id"]
+
+    def _get_json(self, endpoint, params=None, trim=None):
+        # trim keeps what's used of a response, the rest isn't cached
+        key = ResponseCache.make_key(endpoint, params)
+        data = self.cache.get(key)
+        if data is not None:
+            Instrumentation.count("api cache hit")
+            return data
+        Instrumentation.count("api cache miss")
+        response = self._get(f"{API_URL}{endpoint}", params)
+        if response.status_code == 200:
+            data = response.json()
+            if trim is not None:
+                data = trim(data)
+            self.cache.set(key, data)
+            return data
+        print(f"Error {response.status_code}")
+
+    def _get(self, url, params=None, headers=None, stream=False):
+        # retries on connection errors, 429 and 5xx responses. Only the api
+        # needs the key and the rate limit, images come from a cdn
+        import requests
+
+        is_api = url.startswith(API_URL)
+        if is_api:
+            params = {**(params or {}), "api_key": self.api_key}
+        span_name = f"http {_endpoint_name(url)}"
+        for attempt in range(MAX_RETRIES):
+            if is_api:
+                with Instrumentation.span("rate limit wait"):
+                    self.limiter.acquire()
+            try:
+                with Instrumentation.span(span_name):
+                    response = self.session.get(
+                        url, params=params, headers=headers, timeout=TIMEOUT, stream=stream
+                    )
+            except requests.RequestException:
+                Instrumentation.count("http error")
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                response = None
+            else:
+                if response.status_code != 429 and response.status_code < 500:
+                    return response
+                Instrumentation.count(f"http {response.status_code}")
+                if attempt == MAX_RETRIES - 1:
+                    return response
+                response.close()
+            Instrumentation.count("http retry")
+            time.sleep(_backoff(response, attempt))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ApiClient()
+        return _client
+
+
+def use_transport(adapter, api_key=None, cache=None, limiter=None, misses=None):
+    # every module level call goes through adapter from now on
+    global _client
+    with _client_lock:
+        _client = ApiClient(
+            api_key=api_key,
+            cache=cache,
+            limiter=limiter,
+            adapter=adapter,
+            misses=misses,
+        )
+        return _client
 
 
 def get_api_key():
     try:
         with open("api_key.txt", "r") as f:
-            return f.readline()
+            return f.readline().strip()
     except:
         print("No api key found!")
 
 
+def _endpoint_name(url):
+    # /movie/603 and /movie/13 share one histogram
+    if url.startswith(API_URL):
+        return re.sub(r"/\d+", "/{id}", url[len(API_URL) :])
+    return "image"
+
+
+def _backoff(response, attempt):
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return int(retry_after)
+    return 0.5 * 2**attempt + random.uniform(0, 0.5)
+
+
 def get_movie_info(title, year):
-    url = f"https://api.themoviedb.org/3/search/movie?include_adult=true&query={title}&api_key={get_api_key()}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        for movie in data["results"]:
-            if movie["release_date"].split("-")[0] == str(year):
-                return movie
-    else:
-        print(f"Error {response.status_code}")
+    return get_client().get_movie_info(title, year)
 
 
 def get_cast_info(id):
-    url = f"https://api.themoviedb.org/3/movie/{id}/credits?api_key={get_api_key()}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
+    return get_client().get_cast_info(id)
+
+
+def get_movie_details(movie_id):
+    return get_client().get_movie_details(movie_id)
 
 
-def get_poster(poster_path):
-    url = f"https://image.tmdb.org/t/p/original{poster_path}?api_key={get_api_key()}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.content
+def download_poster(poster_path, dest, size=POSTER_SIZE, validators=None):
+    return get_client().download_poster(poster_path, dest, size, validators)
 
 
 def get_imdb_id(movie_id):
-    url = f"https://api.themoviedb.org/3/movie/{movie_id}/external_ids?api_key={get_api_key()}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()["imdb_id"]
+    return get_client().get_imdb_id(movie_id)
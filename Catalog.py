@@ -0,0 +1,280 @@
+import sqlite3, json, os, pickle, threading
+from pathlib import Path
+
+CATALOG_FILE = "catalog.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS movies (
+    folder TEXT PRIMARY KEY,
+    title TEXT,
+    year INTEGER,
+    resolution TEXT,
+    director TEXT,
+    path TEXT,
+    info TEXT NOT NULL,
+    mtime INTEGER,
+    inode INTEGER,
+    size INTEGER
+);
+CREATE TABLE IF NOT EXISTS people (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS credits (
+    folder TEXT NOT NULL REFERENCES movies(folder) ON DELETE CASCADE,
+    person_id INTEGER NOT NULL REFERENCES people(id),
+    role TEXT NOT NULL,
+    character TEXT,
+    position INTEGER
+);
+CREATE INDEX IF NOT EXISTS movies_year ON movies(year);
+CREATE INDEX IF NOT EXISTS movies_title ON movies(title);
+CREATE INDEX IF NOT EXISTS movies_director ON movies(director);
+CREATE INDEX IF NOT EXISTS credits_folder ON credits(folder);
+CREATE INDEX IF NOT EXISTS credits_person ON credits(person_id);
+"""
+COLUMNS = ("title", "year", "resolution", "director")  # filters pushed down to sql
+SNAPSHOT_VERSION = 1  # bumped whenever the layout of the snapshot changes
+
+
+def _lower(value):
+    # python's lower, so contains matches the in-memory filters
+    return None if value is None else str(value).lower()
+
+
+class Catalog:
+    # movies, people and credits in sqlite, written one movie at a time
+    def __init__(self, path=CATALOG_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.create_function("py_lower", 1, _lower, deterministic=True)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def get_meta(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    def is_empty(self):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM movies LIMIT 1").fetchone() is None
+
+    def load_movies(self):
+        # folder : info
+        with self.lock:
+            rows = self.conn.execute("SELECT folder, info FROM movies").fetchall()
+        return {folder: json.loads(info) for folder, info in rows}
+
+    def load_manifest(self):
+        # folder : path, mtime, inode, size of the folders that are up to date
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT folder, path, mtime, inode, size FROM movies "
+                "WHERE mtime IS NOT NULL"
+            ).fetchall()
+        return {
+            folder: {"path": path, "mtime": mtime, "inode": inode, "size": size}
+            for folder, path, mtime, inode, size in rows
+        }
+
+    def upsert_movies(self, movies):
+        # movies are (folder, info, manifest entry or None) tuples
+        with self.lock, self.conn:
+            written = 0
+            for folder, info, stat in movies:
+                self._upsert(folder, info, stat or {})
+                written += 1
+            if written:
+                self._bump_generation()
+
+    def delete_movies(self, folders):
+        if not folders:
+            return
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM movies WHERE folder = ?", [(f,) for f in folders]
+            )
+            self._bump_generation()
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM movies")
+            self.conn.execute("DELETE FROM people")
+            self._bump_generation()
+
+    def generation(self):
+        # counts the writes to the movies, a snapshot is only good for one
+        return int(self.get_meta("generation") or 0)
+
+    def _bump_generation(self):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('generation', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def snapshot_path(self):
+        return f"{self.path}.snapshot"
+
+    def save_snapshot(self, directory, data):
+        # a pickle of the movies as they are in memory, loads several times
+        # faster than the json rows. Stamped with the current generation
+        path = self.snapshot_path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                (SNAPSHOT_VERSION, directory, self.generation(), data),
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, path)
+
+    def load_snapshot(self, directory):
+        # the saved data, or None when there's no snapshot or the catalog
+        # was written after it
+        try:
+            with open(self.snapshot_path(), "rb") as f:
+                version, saved_directory, generation, data = pickle.load(f)
+        except Exception:
+            return None
+        if (
+            version != SNAPSHOT_VERSION
+            or saved_directory != directory
+            or generation != self.generation()
+        ):
+            return None
+        return data
+
+    def query(self, field, method, value):
+        # folders matching a filter, or None when the field has no column
+        if field not in COLUMNS:
+            return None
+        try:
+            number = int(value)
+        except ValueError:
+            number = None
+        if field == "year":
+            # years are stored as integers, the filters compare them as numbers
+            text = str(number) if number is not None else str(value)
+            if method == "equals":
+                sql, args = "CAST(year AS TEXT) = ?", (text,)
+            elif method in ("greater than", "less than") and number is not None:
+                op = ">" if method == "greater than" else "<"
+                sql, args = f"typeof(year) = 'integer' AND year {op} ?", (number,)
+            elif method == "contains":
+                sql, args = "instr(py_lower(year), ?) > 0", (text.lower(),)
+            else:
+                return []
+        else:
+            if method == "equals":
+                sql, args = f"{field} = ?", (str(value),)
+            elif method == "contains":
+                sql, args = f"instr(py_lower({field}), ?) > 0", (str(value).lower(),)
+            else:
+                return []
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT folder FROM movies WHERE {sql}", args
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def import_json(self, init_path="init.json"):
+        # one time import of init.json and the tags.json files in each folder
+        if not self.is_empty() or self.get_meta("imported"):
+            return 0
+        try:
+            with open(init_path, encoding="utf-8") as f:
+                init_info = json.load(f)
+        except (OSError, ValueError):
+            init_info = {}
+        movies = {}
+        for info in init_info.get("movies", []):
+            if "path" in info:
+                movies[Path(info["path"]).name] = info
+        directory = init_info.get("dir")
+        if directory and os.path.isdir(directory):
+            for folder in os.listdir(directory):
+                tags_path = os.path.join(directory, folder, "tags.json")
+                if folder in movies or not os.path.isfile(tags_path):
+                    continue
+                try:
+                    with open(tags_path, encoding="utf-8") as f:
+                        movies[folder] = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                movies[folder]["path"] = os.path.join(directory, folder)
+        manifest = init_info.get("manifest", {})
+        self.upsert_movies(
+            (folder, info, manifest.get(folder)) for folder, info in movies.items()
+        )
+        if directory:
+            self.set_meta("dir", directory)
+        self.set_meta("imported", "1")
+        return len(movies)
+
+    def _upsert(self, folder, info, stat):
+        director = info.get("director")
+        year = info.get("year")
+        self.conn.execute(
+            "INSERT INTO movies "
+            "(folder, title, year, resolution, director, path, info, mtime, inode, size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(folder) DO UPDATE SET title = excluded.title, "
+            "year = excluded.year, resolution = excluded.resolution, "
+            "director = excluded.director, path = excluded.path, "
+            "info = excluded.info, mtime = excluded.mtime, "
+            "inode = excluded.inode, size = excluded.size",
+            (
+                folder,
+                info.get("title"),
+                year,
+                info.get("resolution"),
+                director,
+                info.get("path"),
+                json.dumps(info, ensure_ascii=False),
+                stat.get("mtime"),
+                stat.get("inode"),
+                stat.get("size"),
+            ),
+        )
+        self.conn.execute("DELETE FROM credits WHERE folder = ?", (folder,))
+        credits = []
+        if director and director != "-":
+            credits.append((director, "director", None, 0))
+        screenplay = info.get("screenplay", [])
+        if isinstance(screenplay, list):
+            credits += [(name, "screenplay", None, i) for i, name in enumerate(screenplay)]
+        cast = info.get("cast", [])
+        if isinstance(cast, list):
+            credits += [
+                (person["name"], "cast", person.get("as"), i)
+                for i, person in enumerate(cast)
+            ]
+        for name, role, character, position in credits:
+            self.conn.execute("INSERT OR IGNORE INTO people (name) VALUES (?)", (name,))
+            self.conn.execute(
+                "INSERT INTO credits (folder, person_id, role, character, position) "
+                "SELECT ?, id, ?, ?, ? FROM people WHERE name = ?",
+                (folder, role, character, position, name),
+            )
@@ -0,0 +1,169 @@
+import math, threading
+import tkinter as tk
+from tkinter import ttk
+from collections import Counter
+
+CHART_FIELDS = ("year", "resolution", "director", "genre", "codec", "duration")
+BINS = 10  # bars of a histogram
+TOP_VALUES = 20  # bars of a count chart, directors alone run into thousands
+
+
+def chart_values(movie, field):
+    # what a movie is counted under, lists are counted once per item
+    if field == "genre":
+        return movie.genres
+    value = movie.info.get(field)
+    if value is None or value == "-" or isinstance(value, dict):
+        return []
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, (str, int, float))]
+    return [value]
+
+
+def histogram(counts, bins=BINS):
+    # equal width bins over the counted numbers, returns labels and heights
+    low, high = int(min(counts)), int(max(counts))
+    width = max(1, math.ceil((high - low + 1) / bins))
+    heights = [0] * math.ceil((high - low + 1) / width)
+    for value, count in counts.items():
+        heights[(int(value) - low) // width] += count
+    labels = [f"{low + i * width}-{low + (i + 1) * width - 1}" for i in range(len(heights))]
+    return labels, heights
+
+
+class ChartData:
+    # per field counts of the shown movies. Movies coming into or leaving the
+    # view and movies changed in place are applied one at a time, a field is
+    # only counted from scratch the first time it is charted
+    def __init__(self):
+        self.movies = {}  # id(movie) : movie, the counted ones
+        self.counts = {}  # field : Counter of values
+        self.counted = {}  # field : id(movie) : values it was counted under
+        self.changed = set()  # ids of movies changed in place since set_movies
+        self.lock = threading.Lock()
+
+    def movies_changed(self, movies):
+        # called by the movie index from any thread
+        with self.lock:
+            self.changed.update(map(id, movies))
+
+    def set_movies(self, movies):
+        shown = {id(movie): movie for movie in movies}
+        with self.lock:
+            changed, self.changed = self.changed, set()
+        gone = self.movies.keys() - shown.keys()
+        added = shown.keys() - self.movies.keys()
+        changed &= self.movies.keys() & shown.keys()
+        for field in self.counts:
+            for key in gone | changed:
+                self._uncount(field, key)
+            for key in added | changed:
+                self._count(field, key, shown[key])
+        self.movies = shown
+
+    def field(self, field):
+        if field not in self.counts:
+            self.counts[field] = Counter()
+            self.counted[field] = {}
+            for key, movie in self.movies.items():
+                self._count(field, key, movie)
+        return self.counts[field]
+
+    def _count(self, field, key, movie):
+        values = chart_values(movie, field)
+        if values:
+            self.counted[field][key] = values
+            self.counts[field].update(values)
+
+    def _uncount(self, field, key):
+        values = self.counted[field].pop(key, None)
+        if values:
+            counts = self.counts[field]
+            counts.subtract(values)
+            for value in values:
+                if value in counts and counts[value] <= 0:
+                    del counts[value]
+
+
+class ChartView:
+    # one figure for the whole session, the bars are updated in place
+    def __init__(self, parent):
+        self.parent = parent
+        self.data = ChartData()
+        self.figure = self.canvas = self.axes = self.bars = self.message = None
+
+        top = ttk.Frame(parent)
+        top.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(top, text="Chart by:").pack(side=tk.LEFT)
+        self.field = ttk.Combobox(top, state="readonly", values=CHART_FIELDS)
+        self.field.current(0)
+        self.field.pack(side=tk.LEFT, padx=5)
+        self.field.bind("<<ComboboxSelected>>", lambda _: self.draw())
+
+    def set_movies(self, movies):
+        self.data.set_movies(movies)
+        self.draw()
+
+    def draw(self):
+        self._create_figure()
+        field = self.field.get()
+        counts = self.data.field(field)
+        if not counts:
+            self._show_message("No data to display")
+            return
+        numbers = {v: n for v, n in counts.items() if isinstance(v, (int, float))}
+        if len(numbers) * 2 > len(counts):
+            # a few placeholders like an unknown year are left out
+            labels, heights = histogram(numbers)
+            self.axes.set_title(f"Distribution of {field}")
+        else:
+            top = counts.most_common(TOP_VALUES)
+            labels = [str(value) for value, _ in top]
+            heights = [count for _, count in top]
+            more = f", top {TOP_VALUES} of {len(counts)}" if len(counts) > TOP_VALUES else ""
+            self.axes.set_title(f"Count by {field}{more}")
+
+        if self.bars is not None and len(self.bars) == len(heights):
+            for bar, height in zip(self.bars, heights):
+                bar.set_height(height)
+        else:
+            if self.bars is not None:
+                self.bars.remove()
+            self.bars = self.axes.bar(range(len(heights)), heights, edgecolor="black")
+        self.message.set_visible(False)
+        self.axes.set_xticks(range(len(labels)), labels, rotation=45, ha="right")
+        self.axes.set_xlim(-0.5, len(heights) - 0.5)
+        self.axes.set_ylim(0, max(heights) * 1.05 or 1)
+        self.axes.set_ylabel("Count")
+        self.canvas.draw_idle()
+
+    def _show_message(self, text):
+        if self.bars is not None:
+            self.bars.remove()
+            self.bars = None
+        self.axes.set_title("")
+        self.axes.set_xticks([])
+        self.message.set_text(text)
+        self.message.set_visible(True)
+        self.canvas.draw_idle()
+
+    def _create_figure(self):
+        # matplotlib loads with the first chart, not with the app
+        if self.figure is not None:
+            return
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.figure = Figure(figsize=(8, 4), layout="constrained")
+        self.axes = self.figure.add_subplot()
+        self.message = self.axes.text(
+            0.5,
+            0.5,
+            "",
+            horizontalalignment="center",
+            verticalalignment="center",
+            transform=self.axes.transAxes,
+            visible=False,
+        )
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.parent)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
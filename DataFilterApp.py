@@ -1,24 +1,39 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from FolderManager import FolderManager, Tag, NoInitException
-import json, os
-from PIL import Image, ImageTk
-import webbrowser
+from FolderWatcher import FolderWatcher
+from FilterExpression import FilterSyntaxError
+from ThumbnailCache import ThumbnailCache
+from PhotoView import MovieListView
+from TableView import MovieTable
+from ChartView import ChartView
+from Pipeline import LibraryPipeline
+from Catalog import Catalog
+import Instrumentation
+import json, os, time, queue, threading
+
+WATCH_POLL_MS = 500
+PIPELINE_POLL_MS = 200
+PIPELINE_BATCH = 500  # events handled per poll
+PIPELINE_REFRESH_S = 1.0  # views are redrawn at most this often while loading
+FIRST_WINDOW_BUDGET = 1.0  # seconds from start to the first paint, for 10k movies
 
 
 class DataFilterApp:
     def __init__(self, root):
         self.root = root
-        try:
-            with open("init.json") as f:
-                directory = json.load(f)["dir"]
-                assert directory is not None
-        except:
+        catalog = Catalog()
+        catalog.import_json()
+        directory = catalog.get_meta("dir")
+        if directory is None:
             directory = filedialog.askdirectory(title="Select Data Directory")
-        self.folder_manager = FolderManager(directory)
+        self.directory = directory
+        # the last snapshot is painted right away, the pipeline reconciles it
+        # with the folder and tmdb afterwards
+        self.folder_manager = FolderManager(
+            directory, scan=False, catalog=catalog, snapshot=True
+        )
+        self.folder_manager.load_catalog()  # no snapshot or an outdated one
 
         self.root.title("Data Filter Application")
         self.root.geometry("800x600")
@@ -27,22 +42,135 @@ class DataFilterApp:
         # root.configure(bg="#2E2E2E")
 
         self.movies = self.folder_manager.get_movies()
+        self.current_query = self.folder_manager.get_movies
+        self.thumbnails = ThumbnailCache()
 
         self.create_widgets()
         self.display_all_data()
+        self.start_pipeline()
 
     def create_widgets(self):
         self.create_top_frame()
         self.create_filter_frame()
         self.create_data_frame()
         self.create_photo_view()
-        self.create_movie_entries()
         self.create_treeview()
+        self.create_chart_view()
         self.create_json_viewer()
+        self.create_diagnostics_view()
         self.create_status_var()
         self.bind_all()
 
+    def start_pipeline(self):
+        # movies show up as soon as they are parsed, enrichment follows
+        self.pipeline = LibraryPipeline(self.folder_manager)
+        self.progress = {"scanned": 0, "parsed": 0, "enriching": 0, "enriched": 0}
+        self.refresh_pending, self.refreshed_at = False, 0.0
+        self.reset_pending = False
+        self.pipeline.start()
+        self.root.after(PIPELINE_POLL_MS, self._poll_pipeline)
+
+    def _poll_pipeline(self):
+        changed, done, cancelled = False, False, False
+        for _ in range(PIPELINE_BATCH):
+            try:
+                kind, payload = self.pipeline.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind in ("scanned", "enriching"):
+                self.progress[kind] = payload
+            elif kind in ("parsed", "enriched"):
+                self.progress[kind] += 1
+                changed = True
+            elif kind in ("probed", "removed"):
+                changed = changed or payload > 0
+            elif kind == "done":
+                done, cancelled = True, payload
+        # the changes of several polls go into one redraw
+        self.refresh_pending = self.refresh_pending or changed
+        now = time.perf_counter()
+        if self.refresh_pending and (done or now - self.refreshed_at >= PIPELINE_REFRESH_S):
+            self.refresh_pending, self.refreshed_at = False, now
+            self.refresh_movies()
+
+        if done:
+            self.update_filter_fields(refresh=True)  # enrichment and probes add fields
+            self.cancel_button.pack_forget()
+            self.status_var.set("Loading cancelled" if cancelled else "Ready")
+            self.start_watcher(self.directory)
+            if self.reset_pending:
+                self.reset_pending = False
+                self._reset_movies()
+            return
+        if self.progress["enriching"]:
+            self.status_var.set(
+                f"Updating movie info {self.progress['enriched']}/{self.progress['enriching']}"
+            )
+        else:
+            self.status_var.set(
+                f"Loading movies {self.progress['parsed']}/{self.progress['scanned']}"
+            )
+        self.root.after(PIPELINE_POLL_MS, self._poll_pipeline)
+
+    def cancel_loading(self):
+        self.pipeline.cancel()
+        self.status_var.set("Cancelling...")
+
+    def start_watcher(self, directory):
+        # the watcher thread syncs the folder manager, the views are
+        # refreshed from the tk main loop
+        self.folder_changes = queue.Queue()
+        self.watcher = FolderWatcher(directory, self._sync_folder)
+        self.watcher.start()
+        self.root.after(WATCH_POLL_MS, self._apply_folder_changes)
+
+    def _sync_folder(self):
+        # on the watcher thread. The views get the new folders right away,
+        # tmdb fills them in on a thread of its own
+        changes = self.folder_manager.sync_movies()
+        self.folder_changes.put(("synced", changes))
+        added = changes[0]
+        if added:
+            threading.Thread(target=self._enrich_added, args=(added,), daemon=True).start()
+
+    def _enrich_added(self, added):
+        try:
+            enriched = self.folder_manager.enrich_movies(added)
+        except Exception as e:
+            print(f"Couldn't enrich the new movies: {e}")
+            return
+        self.folder_changes.put(("enriched", enriched))
+
+    def _apply_folder_changes(self):
+        added, removed, renamed, enriched = [], [], [], []
+        while not self.folder_changes.empty():
+            kind, payload = self.folder_changes.get_nowait()
+            if kind == "synced":
+                added += payload[0]
+                removed += payload[1]
+                renamed += payload[2]
+            else:
+                enriched += payload
+        if added or removed or renamed:
+            self.refresh_movies()
+            self.status_var.set(
+                f"Library updated: {len(added)} added, {len(removed)} removed, {len(renamed)} renamed"
+            )
+        elif enriched:
+            self.refresh_movies()
+            self.status_var.set(f"Library updated: {len(enriched)} new movies enriched")
+        self.root.after(WATCH_POLL_MS, self._apply_folder_changes)
+
     def reset_movies(self):
+        # enrichment still in flight would write into the reset movies, so
+        # a running pipeline is cancelled and the reset waits for its done
+        if self.pipeline.is_alive():
+            self.reset_pending = True
+            self.cancel_loading()
+            return
+        self._reset_movies()
+
+    def _reset_movies(self):
         self.folder_manager.reset_movie_info()
         try:
             self.display_all_data()
@@ -58,6 +186,10 @@ class DataFilterApp:
             command=self.reset_movies,
         )
         load_button.pack(side="right", padx=5)
+        self.cancel_button = ttk.Button(
+            top_frame, text="Cancel Loading", command=self.cancel_loading
+        )
+        self.cancel_button.pack(side="right", padx=5)
 
     def create_filter_frame(self):
         filter_frame = ttk.LabelFrame(self.root, text="Filter Options")
@@ -107,6 +239,20 @@ class DataFilterApp:
         )
         self.reset_button.grid(row=1, column=3, padx=5, pady=5)
 
+        ttk.Label(filter_frame, text="Expression:").grid(
+            row=2, column=0, padx=5, pady=5, sticky="w"
+        )
+        self.filter_expression = ttk.Entry(filter_frame, width=60)
+        self.filter_expression.grid(
+            row=2, column=1, columnspan=2, padx=5, pady=5, sticky="we"
+        )
+        self.filter_expression.bind("<Return>", lambda _: self.apply_expression())
+
+        self.expression_button = ttk.Button(
+            filter_frame, text="Apply Expression", command=self.apply_expression
+        )
+        self.expression_button.grid(row=2, column=3, padx=5, pady=5)
+
         self._on_filter_type_change(None)
 
     def create_data_frame(self):
@@ -128,122 +274,35 @@ class DataFilterApp:
         self.json_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.json_frame, text="JSON View")
 
-    def create_photo_view(self):
-        self.canvas = tk.Canvas(self.photo_frame)
-        self.canvas.pack(side="left", fill="both", expand=True)
+        self.diagnostics_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.diagnostics_frame, text="Diagnostics")
+
+        # only the selected tab is rendered, the others when they are opened
+        self.views = {
+            str(self.photo_frame): lambda movies: self.photo_view.set_movies(movies),
+            str(self.table_frame): lambda movies: self.table.set_movies(movies),
+            str(self.chart_frame): lambda movies: self.chart.set_movies(movies),
+            str(self.json_frame): self.render_json,
+        }
+        self.stale_views = set()
+        self.displayed = None
+        self.displayed_movies = []
+        self.notebook.bind("<<NotebookTabChanged>>", self._render_current_view)
 
-        y_scrollbar = ttk.Scrollbar(
-            self.photo_frame, orient="vertical", command=self.canvas.yview
-        )
-        y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.canvas.configure(yscrollcommand=y_scrollbar.set)
-
-        self.inner_frame = ttk.Frame(self.canvas)
-        self.inner_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")),
-        )
-        self.inner_window = self.canvas.create_window(
-            (0, 0), window=self.inner_frame, anchor="nw"
+    def create_photo_view(self):
+        self.photo_view = MovieListView(
+            self.photo_frame, self.thumbnails, self.open_file_path
         )
+        self.canvas = self.photo_view.canvas
 
-    def clear_movie_entries(self):
-        for widget in self.inner_frame.winfo_children():
-            widget.destroy()
-
-    def create_movie_entries(self):
-        self.image_references = []
-        try:
-            imdb_icon = Image.open("resources/imdb_icon.png")
-            imdb_icon = imdb_icon.resize((50, 50))
-
-        except:
-            pass
-        target_height = 128
-        for movie in self.movies:
-            movie_entry_frame = ttk.Frame(
-                self.inner_frame, borderwidth=2, relief="solid"
-            )
-            movie_entry_frame.pack(fill="x", padx=5, pady=2)
-
-            image = Image.open(movie.get_image_path())
-            aspect_ratio = image.width / image.height
-            new_width = int(target_height * aspect_ratio)
-            image = image.resize((new_width, target_height))
-            photo = ImageTk.PhotoImage(image)
-
-            self.image_references.append(photo)
-
-            image_label = tk.Label(movie_entry_frame, image=photo)
-            image_label.pack(side="left")
-            image_label.bind(
-                "<Button-1>", lambda _, path=movie.path: self.open_file_path(path)
-            )
-            text = f"{movie.title} ({movie.year})\n\nDirector:\t\t{movie.director}"
-            if len(movie.screenplay) > 0:
-                text += f"\nScreenplay:\t{", ".join(movie.screenplay)}"
-            title_label = tk.Label(
-                movie_entry_frame,
-                text=text,
-                font=("Arial", 15),
-                anchor="nw",
-                justify="left",
-            )
-            title_label.pack(anchor="nw", padx=10)
-            title_label.bind(
-                "<Button-1>", lambda _, path=movie.path: self.open_file_path(path)
-            )
-
-            cast = movie.info.get("cast", None)
-            if cast:
-                cast = f"\nCast:\t\t{movie.info["cast"][0]["name"]}, {movie.info["cast"][1]["name"]}"
-                cast_label = tk.Label(movie_entry_frame, text=cast, font=("Arial", 15))
-                cast_label.pack(anchor="nw", padx=10)
-            try:
-                icon = ImageTk.PhotoImage(imdb_icon)
-                imdb_label = tk.Label(movie_entry_frame, image=icon)
-                self.image_references.append(icon)
-            except:
-                imdb_label = tk.Label(movie_entry_frame, text="imdb_link")
-
-            imdb_label.pack(anchor="e", padx=10)
-            imdb_label.bind(
-                "<Button-1>",
-                lambda _, link=f"https://www.imdb.com/title/{movie.imdb_id}": webbrowser.open(
-                    link
-                ),
-            )
+    def create_chart_view(self):
+        self.chart = ChartView(self.chart_frame)
+        # movies enriched in place are counted again on the next chart
+        self.folder_manager.index.watchers.append(self.chart.data.movies_changed)
 
     def create_treeview(self):
-        y_scrollbar = ttk.Scrollbar(self.table_frame)
-        y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        x_scrollbar = ttk.Scrollbar(self.table_frame, orient=tk.HORIZONTAL)
-        x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-
-        # Create treeview
-        self.tree = ttk.Treeview(
-            self.table_frame,
-            yscrollcommand=y_scrollbar.set,
-            xscrollcommand=x_scrollbar.set,
-        )
-
-        # Configure scrollbars
-        y_scrollbar.config(command=self.tree.yview)
-        x_scrollbar.config(command=self.tree.xview)
-
-        data = pd.DataFrame(
-            [movie.displayable_info() for movie in self.folder_manager.get_movies()]
-        )
-        self.tree["columns"] = list(data.columns)
-        self.tree.column("#0", width=0, stretch=tk.NO)  # Hide the first column
-
-        for col in data.columns:
-            self.tree.column(col, anchor=tk.W, width=100)
-            self.tree.heading(col, text=col, anchor=tk.W)
-
-        # Pack treeview
-        self.tree.pack(fill="both", expand=True)
+        self.table = MovieTable(self.table_frame)
+        self.tree = self.table.tree
 
     def create_json_viewer(self):
         y_scrollbar = ttk.Scrollbar(self.json_frame)
@@ -255,6 +314,49 @@ class DataFilterApp:
         self.json_text.pack(fill="both", expand=True)
         y_scrollbar.config(command=self.json_text.yview)
 
+    def create_diagnostics_view(self):
+        buttons = ttk.Frame(self.diagnostics_frame)
+        buttons.pack(fill=tk.X)
+        self.metrics_enabled = tk.BooleanVar(value=Instrumentation.enabled)
+        ttk.Checkbutton(
+            buttons,
+            text="Collect metrics",
+            variable=self.metrics_enabled,
+            command=lambda: Instrumentation.enable(self.metrics_enabled.get()),
+        ).pack(side=tk.LEFT, padx=5, pady=5)
+        ttk.Button(buttons, text="Refresh", command=self.render_diagnostics).pack(
+            side=tk.LEFT, padx=5, pady=5
+        )
+        ttk.Button(buttons, text="Reset", command=self.reset_metrics).pack(
+            side=tk.LEFT, padx=5, pady=5
+        )
+        ttk.Button(buttons, text="Export JSON", command=self.export_metrics).pack(
+            side=tk.LEFT, padx=5, pady=5
+        )
+        self.diagnostics_text = tk.Text(
+            self.diagnostics_frame, wrap=tk.NONE, font=("Courier", 10)
+        )
+        self.diagnostics_text.pack(fill="both", expand=True)
+
+    def render_diagnostics(self):
+        self.diagnostics_text.delete(1.0, tk.END)
+        if Instrumentation.enabled:
+            self.diagnostics_text.insert(tk.END, Instrumentation.summary())
+        else:
+            self.diagnostics_text.insert(tk.END, "Metrics are off")
+
+    def reset_metrics(self):
+        Instrumentation.reset()
+        self.render_diagnostics()
+
+    def export_metrics(self):
+        path = filedialog.asksaveasfilename(
+            defaultextension=".json", initialfile=Instrumentation.METRICS_FILE
+        )
+        if path:
+            Instrumentation.save(path)
+            self.status_var.set(f"Metrics saved to {path}")
+
     def create_status_var(self):
         self.status_var = tk.StringVar()
         self.status_var.set("Ready")
@@ -270,11 +372,11 @@ class DataFilterApp:
 
     def _on_mouse_scroll(self, event):
         if event.delta:  # Windows/macOS
-            self.canvas.yview_scroll(-1 * (event.delta // 120), "units")
+            self.photo_view.scroll(-1 * (event.delta // 120))
         elif event.num == 4:  # Linux scroll up
-            self.canvas.yview_scroll(-1, "units")
+            self.photo_view.scroll(-1)
         elif event.num == 5:  # Linux scroll down
-            self.canvas.yview_scroll(1, "units")
+            self.photo_view.scroll(1)
 
     def _on_filter_type_change(self, event):
         self.filter_value.delete(0, tk.END)
@@ -294,96 +396,98 @@ class DataFilterApp:
             messagebox.showwarning("Filter Error", "Please enter a valid filter value.")
             return
 
-        filtered_data = self.folder_manager.apply_filter(
+        self.current_query = lambda: self.folder_manager.apply_filter(
             filter_type, filter_method, filter_value
         )
+        with Instrumentation.span("filter"):
+            filtered_data = self.current_query()
 
         self.movies = filtered_data
         self.display_filtered_data(filtered_data)
         self.status_var.set(f"Filtered: {len(filtered_data)} records found")
 
-    def reset_filter(self):
-        self.display_all_data()
-        self.status_var.set(f"Filter reset: {len(self.dict_data)} records displayed")
+    def apply_expression(self):
+        expression = self.filter_expression.get()
+        try:
+            with Instrumentation.span("filter expression"):
+                filtered_data = self.folder_manager.apply_expression(expression)
+        except FilterSyntaxError as e:
+            messagebox.showwarning("Filter Error", str(e))
+            return
+        self.current_query = lambda: self.folder_manager.apply_expression(expression)
 
-    def display_all_data(self):
-        self.display_filtered_data(self.folder_manager.get_movies())
+        self.movies = filtered_data
+        self.display_filtered_data(filtered_data)
+        self.status_var.set(f"Filtered: {len(filtered_data)} records found")
 
-    def display_filtered_data(self, movies):
-        filtered_dict_displayable = [movie.displayable_info() for movie in movies]
-        df = pd.DataFrame(filtered_dict_displayable)
-        filtered_df = df[["title"] + [col for col in df.columns if col != "title"]]
-        filtered_all_data = [movie.info for movie in movies]
+    def reset_filter(self):
+        self.display_all_data()
+        self.status_var.set(f"Filter reset: {len(self.movies)} records displayed")
 
-        # Update photo view
-        self.clear_movie_entries()
-        self.create_movie_entries()
+    def update_filter_fields(self, refresh=False):
+        # the library may still be empty when the filter frame is created
+        if (self.filter_type["values"] and not refresh) or not self.folder_manager.movies:
+            return
+        selected = self.filter_type.get()
+        keys = self.folder_manager.get_keys()
+        self.filter_type["values"] = keys
+        if selected in keys:
+            self.filter_type.set(selected)
+        else:
+            self.filter_type.current(0)
 
-        # Update tree view
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    def display_all_data(self):
+        self.current_query = self.folder_manager.get_movies
+        self.refresh_movies()
 
-        if not filtered_df.empty:
-            for i, row in filtered_df.iterrows():
-                self.tree.insert("", tk.END, values=list(row))
+    def refresh_movies(self):
+        # re-runs the current filter on the latest movies
+        self.movies = self.current_query()
+        self.update_filter_fields()
+        self.display_filtered_data(self.movies)
 
-        # Update JSON view
+    def display_filtered_data(self, movies):
+        # nothing to redo when the same movies are shown and none changed
+        displayed = (tuple(map(id, movies)), self.folder_manager.version)
+        if displayed == self.displayed:
+            return
+        self.displayed = displayed
+        self.displayed_movies = movies
+        self.stale_views = set(self.views)
+        self._render_current_view()
+
+    def _render_current_view(self, event=None):
+        tab = self.notebook.select()
+        if tab == str(self.diagnostics_frame):
+            self.render_diagnostics()  # always the latest numbers
+        elif tab in self.stale_views:
+            self.stale_views.discard(tab)
+            with Instrumentation.span(f"render {self.notebook.tab(tab, 'text')}"):
+                self.views[tab](self.displayed_movies)
+
+    def render_json(self, movies):
         self.json_text.delete(1.0, tk.END)
         if movies:
-            json_str = json.dumps(filtered_all_data, indent=2)
+            json_str = json.dumps([movie.to_dict() for movie in movies], indent=2)
             self.json_text.insert(tk.END, json_str)
 
-        # Update chart
-        self.update_chart(filtered_df)
-
-    def update_chart(self, data):
-        # Clear previous chart
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-
-        if data.empty:
-            ttk.Label(self.chart_frame, text="No data to display").pack(expand=True)
-            return
-
-        fig, ax = plt.subplots(figsize=(8, 4))
-
-        filter_type = self.filter_type.get()
-
-        if filter_type in data.columns:
-            if data[filter_type].dtype in [int, float]:
-                ax.hist(data[filter_type], bins=10, edgecolor="black")
-                ax.set_title(f"Distribution of {filter_type}")
-                ax.set_xlabel(filter_type)
-                ax.set_ylabel("Frequency")
-            else:
-                counts = data[filter_type].value_counts()
-                counts.plot(kind="bar", ax=ax)
-                ax.set_title(f"Count by {filter_type}")
-                ax.set_ylabel("Count")
-                ax.tick_params(axis="x", rotation=45)
-        else:
-            ax.text(
-                0.5,
-                0.5,
-                "Select a valid field to display chart",
-                horizontalalignment="center",
-                verticalalignment="center",
-                transform=ax.transAxes,
-            )
-
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
 
 def main():
     def _quit():
+        if not app.pipeline.is_alive():
+            app.folder_manager.save_snapshot()  # with what the watcher changed
         root.quit()
         root.destroy()
 
+    started = time.perf_counter()  # bench_startup.py also counts the imports
     root = tk.Tk()
     root.protocol("WM_DELETE_WINDOW", _quit)
     app = DataFilterApp(root)
+    root.update()
+    first_window = time.perf_counter() - started
+    Instrumentation.observe("first window", first_window)
+    if first_window > FIRST_WINDOW_BUDGET:
+        print(f"First window after {first_window:.2f}s, over the {FIRST_WINDOW_BUDGET}s budget")
     root.mainloop()
 
 
@@ -0,0 +1,213 @@
+import re
+from MovieIndex import matches
+
+# e.g. year > 2000 AND (director contains nolan OR NOT resolution = 1080p)
+TOKEN_RE = re.compile(r"""\s*(?:(\(|\))|"((?:[^"\\]|\\.)*)"|'([^']*)'|(=|>|<)|([^\s()"'=<>]+))""")
+OPERATORS = {
+    "=": "equals",
+    "equals": "equals",
+    ">": "greater than",
+    "<": "less than",
+    "contains": "contains",
+}
+KEYWORDS = ("and", "or", "not")
+VERIFY_RATIO = 4  # check candidates one by one when they are this much fewer
+
+
+class FilterSyntaxError(Exception):
+    pass
+
+
+class Predicate:
+    def __init__(self, field, method, value):
+        self.field = field
+        self.method = method
+        self.value = value
+
+    def estimate(self, index):
+        return index.estimate(self.field, self.method, self.value)
+
+    def evaluate(self, index):
+        return index.query_keys(self.field, self.method, self.value)
+
+    def matches(self, movie):
+        return matches(movie, self.field, self.method, self.value)
+
+    def __repr__(self):
+        return f"{self.field} {self.method} {self.value!r}"
+
+
+class And:
+    def __init__(self, children):
+        self.children = children
+
+    def estimate(self, index):
+        return min(child.estimate(index) for child in self.children)
+
+    def evaluate(self, index):
+        # most selective first, the rest either intersect or check candidates
+        children = sorted(self.children, key=lambda child: child.estimate(index))
+        keys = children[0].evaluate(index)
+        for child in children[1:]:
+            if not keys:
+                break
+            if len(keys) * VERIFY_RATIO < child.estimate(index):
+                keys = {key for key in keys if child.matches(index.movies[key])}
+            else:
+                keys &= child.evaluate(index)
+        return keys
+
+    def matches(self, movie):
+        return all(child.matches(movie) for child in self.children)
+
+    def __repr__(self):
+        return f"({' AND '.join(map(repr, self.children))})"
+
+
+class Or:
+    def __init__(self, children):
+        self.children = children
+
+    def estimate(self, index):
+        return min(sum(child.estimate(index) for child in self.children), index.size())
+
+    def evaluate(self, index):
+        keys = set()
+        for child in self.children:
+            keys |= child.evaluate(index)
+        return keys
+
+    def matches(self, movie):
+        return any(child.matches(movie) for child in self.children)
+
+    def __repr__(self):
+        return f"({' OR '.join(map(repr, self.children))})"
+
+
+class Not:
+    def __init__(self, child):
+        self.child = child
+
+    def estimate(self, index):
+        return index.size() - self.child.estimate(index)
+
+    def evaluate(self, index):
+        return index.all_keys() - self.child.evaluate(index)
+
+    def matches(self, movie):
+        return not self.child.matches(movie)
+
+    def __repr__(self):
+        return f"NOT {self.child!r}"
+
+
+def tokenize(text):
+    tokens = []  # (kind, value), kind is one of paren, quoted, op, word
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = TOKEN_RE.match(text, pos)
+        if not match:
+            raise FilterSyntaxError(f"Unexpected character at {pos}: {text[pos:]}")
+        paren, double, single, op, word = match.groups()
+        if paren:
+            tokens.append(("paren", paren))
+        elif double is not None:
+            tokens.append(("quoted", re.sub(r"\\(.)", r"\1", double)))
+        elif single is not None:
+            tokens.append(("quoted", single))
+        elif op:
+            tokens.append(("op", op))
+        else:
+            tokens.append(("word", word))
+        pos = match.end()
+    return tokens
+
+
+class Parser:
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise FilterSyntaxError("Empty filter expression")
+        node = self._or()
+        if self.pos < len(self.tokens):
+            raise FilterSyntaxError(f"Unexpected {self.tokens[self.pos][1]!r}")
+        return node
+
+    def _peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None)
+
+    def _keyword(self, keyword):
+        kind, value = self._peek()
+        if kind == "word" and value.lower() == keyword:
+            self.pos += 1
+            return True
+        return False
+
+    def _or(self):
+        children = [self._and()]
+        while self._keyword("or"):
+            children.append(self._and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def _and(self):
+        children = [self._not()]
+        while self._keyword("and"):
+            children.append(self._not())
+        return children[0] if len(children) == 1 else And(children)
+
+    def _not(self):
+        if self._keyword("not"):
+            return Not(self._not())
+        if self._peek() == ("paren", "("):
+            self.pos += 1
+            node = self._or()
+            if self._peek() != ("paren", ")"):
+                raise FilterSyntaxError("Missing closing parenthesis")
+            self.pos += 1
+            return node
+        return self._predicate()
+
+    def _predicate(self):
+        kind, field = self._peek()
+        if kind not in ("word", "quoted"):
+            raise FilterSyntaxError(f"Expected a field name, got {field!r}")
+        self.pos += 1
+        return Predicate(field, self._method(), self._value())
+
+    def _method(self):
+        kind, value = self._peek()
+        if kind is None:
+            raise FilterSyntaxError("Expected an operator")
+        self.pos += 1
+        value = value.lower()
+        if value in ("greater", "less") and self._keyword("than"):
+            value = f"{value} than"
+        if value in ("greater than", "less than"):
+            return value
+        if value not in OPERATORS:
+            raise FilterSyntaxError(f"Unknown operator {value!r}")
+        return OPERATORS[value]
+
+    def _value(self):
+        kind, value = self._peek()
+        if kind == "quoted":
+            self.pos += 1
+            return value
+        words = []
+        while kind == "word" and value.lower() not in KEYWORDS:
+            words.append(value)
+            self.pos += 1
+            kind, value = self._peek()
+        if not words:
+            raise FilterSyntaxError("Expected a value")
+        return " ".join(words)
+
+
+def parse(text):
+    return Parser(text).parse()
@@ -1,7 +1,16 @@
-import os, re, json, cv2, random, shutil
+import os, gc, shutil, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from enum import Enum
-from MovieInfo import Movie
+from MovieInfo import Movie, people, HIDDEN_FIELDS
+from MovieIndex import MovieIndex
+from Catalog import Catalog
+import FilterExpression
+import NameParser
+import Instrumentation
+import ApiController
+import VideoProbe
 from pathlib import Path
+from stat import S_ISDIR
 
 
 class Tag(Enum):
@@ -18,22 +27,104 @@ class NoInitException(Exception):
     pass
 
 
+ENRICH_WORKERS = 8
+POSTER_WORKERS = 8  # concurrent poster downloads
+# what tells whether a folder changed. Device and the dir flag are only
+# known for folders stat'ed in this run or saved in a snapshot
+STAT_KEYS = ("path", "mtime", "inode", "size")
+RENAME_KEYS = ("device", "dir", "mtime", "size")  # all must match besides the inode
+
+
+def _same_stat(saved, stat):
+    return saved is not None and all(saved.get(key) == stat[key] for key in STAT_KEYS)
+
+
 class FolderManager:
-    def __init__(self, dir):
+    def __init__(self, dir, scan=True, catalog=None, snapshot=False):
+        # with snapshot the movies of the last snapshot are restored right
+        # away when it's still current, scan or load_catalog reconcile them
         self.path = dir
-        try:
-            self.init_info = self._get_info_from_file("init.json")
-            self.init_info["dir"] = self.path
-        except:
-            self.init_info = {"dir": dir}
-        self.movies: dict[str, Movie] = {}  # title : movie_object
-        self.create_movies()
-        self.save_new_info()
+        self.catalog = catalog or Catalog()
+        self.catalog.import_json()
+        if self.catalog.get_meta("dir") not in (None, dir):
+            self.catalog.clear()
+        self.catalog.set_meta("dir", dir)
+        self.movies: dict[str, Movie] = {}  # folder_name : movie_object
+        self.manifest: dict[str, dict] = {}  # folder_name : path, mtime, inode, size
+        self.lock = threading.RLock()  # guards movies against the folder watcher
+        self.index = MovieIndex(pushdown=self._query_catalog)
+        self.version = 0  # bumped whenever movies or their info change
+        self.dirty = set()  # folders to write on the next save
+        self.removed = set()  # folders to delete on the next save
+        self.saving = 0  # saves taken from dirty but not in the catalog yet
+        self.cached_movies, self.cached_manifest = {}, {}
+        if not (snapshot and self.load_snapshot()):
+            self.cached_movies = self.catalog.load_movies()  # folder_name : saved info
+            self.cached_manifest = self.catalog.load_manifest()
+        if scan:
+            self.create_movies()
+            self.save_new_info()
 
     def save_new_info(self):
-        new_movies_info = [movie.info for movie in self.movies.values()]
-        new_info = {"dir": self.path, "movies": new_movies_info}
-        self._write_to_file("init.json", new_info)
+        # only the movies that changed since the last save are written
+        with self.lock:
+            changed = [
+                (name, self.movies[name].to_dict(), self.manifest.get(name))
+                for name in self.dirty
+                if name in self.movies
+            ]
+            removed = [name for name in self.removed if name not in self.movies]
+            self.dirty, self.removed = set(), set()
+            self.saving += 1
+        try:
+            with Instrumentation.span("catalog save"):
+                self.catalog.delete_movies(removed)
+                self.catalog.upsert_movies(changed)
+        finally:
+            with self.lock:
+                self.saving -= 1
+
+    def save_snapshot(self):
+        # the movies as they are in memory, for an instant start next time
+        self.save_new_info()
+        with self.lock, people.lock, Instrumentation.span("snapshot save"):
+            data = {
+                "people": people.people,
+                "movies": [
+                    (name, movie.info, movie.cast_ids)
+                    for name, movie in self.movies.items()
+                ],
+                "manifest": self.manifest,
+            }
+            self.catalog.save_snapshot(self.path, data)
+
+    def load_snapshot(self):
+        # True when the snapshot matched the catalog and its movies are in
+        gc_was_enabled = gc.isenabled()
+        gc.disable()  # the collector would run over and over on the fresh objects
+        try:
+            with Instrumentation.span("snapshot load"):
+                restored = self._restore_snapshot()
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return restored
+
+    def _restore_snapshot(self):
+        data = self.catalog.load_snapshot(self.path)
+        if data is None:
+            return False
+        ids = people.merge(data["people"])
+        with self.lock:
+            for name, info, cast_ids in data["movies"]:
+                if ids is not None and cast_ids is not None:
+                    cast_ids = tuple((ids[i], character) for i, character in cast_ids)
+                movie = Movie.restore(info, cast_ids)
+                self.movies[name] = movie
+                self.index.add(name, movie)
+            self.manifest = data["manifest"]
+            self.version += 1
+        return True
 
     def initialize_json(self):
         pass
@@ -42,66 +133,265 @@ class FolderManager:
         self.path = path
 
     def get_movies(self):
-        return list(self.movies.values())
+        with self.lock:
+            return list(self.movies.values())
 
     def get_keys(self):
-        return list(list(self.movies.values())[0].displayable_info().keys())
+        # every field any movie has, in the order they first appear. The
+        # cast isn't shown with the rest of the info but can be filtered on
+        shapes = dict.fromkeys(tuple(movie.info) for movie in self.get_movies())
+        keys = dict.fromkeys(key for shape in shapes for key in shape)
+        return [*(key for key in keys if key not in HIDDEN_FIELDS), "cast"]
 
     def apply_filter(self, filter_type, filter_method, filter_value):
-        filtered_movies = []
-        for item in self.movies.values():
-            if filter_type in item.info:
-                item_value = item.info[filter_type]
-
-                try:
-                    if isinstance(item_value, (int, float)):
-                        filter_value_converted = int(filter_value)
-                    else:
-                        filter_value_converted = filter_value
-                except ValueError:
-                    item_value = str(item_value)
-                    filter_value_converted = filter_value
-
-                if filter_method == "equals":
-                    if str(item_value) == str(filter_value_converted):
-                        filtered_movies.append(item)
-                elif filter_method == "greater than":
-                    if (
-                        isinstance(item_value, (int, float))
-                        and item_value > filter_value_converted
-                    ):
-                        filtered_movies.append(item)
-                elif filter_method == "less than":
-                    if (
-                        isinstance(item_value, (int, float))
-                        and item_value < filter_value_converted
-                    ):
-                        filtered_movies.append(item)
-                elif filter_method == "contains":
-                    if str(filter_value_converted).lower() in str(item_value).lower():
-                        filtered_movies.append(item)
-        return filtered_movies
-
-    def create_movies(self):
-        init_movies_info = self.init_info.get("movies", [{}])
-        init_movies_titles = [a.get("title", None) for a in init_movies_info]
-        folders = os.listdir(self.path)
-        for folder_name in folders:
-            if folder_name in init_movies_titles:
-                self.movies[folder_name] = Movie(init_movies_info[folder_name])
+        with self.lock:
+            return self.index.query(filter_type, filter_method, filter_value)
+
+    def _query_catalog(self, filter_type, filter_method, filter_value):
+        # sql for the indexed columns, only while the catalog holds exactly
+        # what's in memory. Called by the index under self.lock
+        if self.dirty or self.removed or self.saving:
+            return None
+        with Instrumentation.span("catalog query"):
+            folders = self.catalog.query(filter_type, filter_method, filter_value)
+        return None if folders is None else set(folders)
+
+    def apply_expression(self, expression):
+        # raises FilterExpression.FilterSyntaxError on malformed expressions
+        node = FilterExpression.parse(expression)
+        with self.lock:
+            return self.index.to_movies(node.evaluate(self.index))
+
+    def create_movies(self, enrich=True):
+        # with enrich=False changed folders are only parsed from their names
+        # and stay out of the manifest. Returns the changed and removed folders
+        to_update, seen = [], set()
+        for entry in self.scan():
+            seen.add(entry.name)
+            try:
+                folder_name, movie, changed = self.load_movie(entry)
+            except OSError as e:
+                print(f"Couldn't load {entry.name}: {e}")
+                continue
+            seen.add(folder_name)
+            self.add_movie(folder_name, movie, enriched=not changed)
+            if changed:
+                to_update.append(folder_name)
+        removed = self.remove_missing(seen)
+
+        if enrich:
+            self._enrich_names(to_update)
+        return to_update, removed
+
+    def load_catalog(self):
+        # the saved movies as they are, without touching the disk. Enough for
+        # queries on a library that was scanned before
+        with self.lock:
+            for name, info in self.cached_movies.items():
+                movie = Movie(info)
+                self.movies[name] = movie
+                if name in self.cached_manifest:
+                    self.manifest[name] = self.cached_manifest[name]
+                self.index.add(name, movie)
+            self.cached_movies, self.cached_manifest = {}, {}
+            self.version += 1
+
+    def remove_missing(self, seen):
+        # drops the movies whose folder wasn't among the seen ones,
+        # returns their names
+        with self.lock:
+            missing = [name for name in self.movies if name not in seen]
+            for name in missing:
+                del self.movies[name]
+                self.manifest.pop(name, None)
+                self.index.remove(name)
+            missing += [name for name in self.cached_movies if name not in seen]
+            self.cached_movies = {}
+            self.removed.update(missing)
+            if missing:
+                self.version += 1
+        return missing
+
+    def scan(self):
+        with Instrumentation.span("scan"), os.scandir(self.path) as it:
+            return list(it)
+
+    def load_movie(self, entry):
+        # folders whose manifest entry still matches are restored as they are,
+        # changed ones keep their cached info but get enriched again.
+        # Returns the folder name, the movie and whether it needs enrichment
+        with self.lock:
+            movie = self.movies.get(entry.name)
+        if movie is not None:
+            # already restored from the snapshot or the catalog
+            Instrumentation.count("movie kept")
+            stat = self._stat_entry(entry)
+            with self.lock:
+                changed = not _same_stat(self.manifest.get(entry.name), stat)
+                if not changed:
+                    self.manifest[entry.name] = stat  # with the device for sync_movies
+            return entry.name, movie, changed
+        if entry.name in self.cached_movies:
+            Instrumentation.count("movie from catalog")
+            stat = self._stat_entry(entry)
+            changed = not _same_stat(self.cached_manifest.get(entry.name), stat)
+            # the movie keeps its own compact copy, the saved one isn't needed again
+            return entry.name, Movie(self.cached_movies.pop(entry.name)), changed
+        Instrumentation.count("movie from name")
+        folder_name, movie = self._create_movie(entry.name)
+        return folder_name, movie, True
+
+    def add_movie(self, folder_name, movie, enriched=True):
+        # movies waiting for enrichment stay out of the manifest until
+        # update_manifest, so an interrupted run picks them up again
+        with self.lock:
+            if (
+                enriched
+                and self.movies.get(folder_name) is movie
+                and folder_name in self.manifest
+            ):
+                return  # a restored movie that's still current, nothing to write
+            self.movies[folder_name] = movie
+            if enriched:
+                self.manifest[folder_name] = self._stat_path(movie.path)
             else:
-                folder_name = self._process_movie(folder_name)
-                info = self._get_info_from_name(folder_name)
-                new_folder_name = f"{info["title"]} ({info["year"]})"
-                if new_folder_name != folder_name:
-                    os.rename(
-                        os.path.join(self.path, folder_name),
-                        os.path.join(self.path, new_folder_name),
-                    )
-                info["path"] = os.path.join(self.path, folder_name)
-                self.movies[new_folder_name] = Movie(info)
-
-        self.update_movie_info()
+                self.manifest.pop(folder_name, None)
+            self.index.add(folder_name, movie)
+            self.dirty.add(folder_name)
+            self.version += 1
+
+    def update_manifest(self, folder_names):
+        # enrichment writes into the folders, so their stats change
+        with self.lock:
+            for name in folder_names:
+                if name in self.movies:
+                    self.manifest[name] = self._stat_path(self.movies[name].path)
+                    self.dirty.add(name)
+
+    def _create_movie(self, ent_name):
+        folder_name = self._process_movie(ent_name)
+        info = self._get_info_from_name(folder_name)
+        new_folder_name = f"{info["title"]} ({info["year"]})"
+        if info["year"] == "unknown":
+            new_folder_name = folder_name  # nothing better to name it
+        if new_folder_name != folder_name:
+            os.rename(
+                os.path.join(self.path, folder_name),
+                os.path.join(self.path, new_folder_name),
+            )
+        info["path"] = os.path.join(self.path, new_folder_name)
+        return new_folder_name, Movie(info)
+
+    def sync_movies(self):
+        # applies only what changed on disk since the last scan, returns
+        # the added, removed and renamed (old, new) folder names. Added
+        # movies only have what their names give, see enrich_movies
+        with os.scandir(self.path) as it:
+            entries = {entry.name: entry for entry in it}
+        with self.lock:
+            known = set(self.movies)
+            inodes = {
+                self.manifest[name]["inode"]: name
+                for name in known - entries.keys()
+                if name in self.manifest
+            }
+            gone = {name: self.manifest[name] for name in inodes.values()}
+        added, renamed, new_movies = [], [], {}
+        for name in entries.keys() - known:
+            try:
+                stat = self._stat_entry(entries[name])
+                old_name = inodes.get(stat["inode"])
+                # a freed inode is reused right away, so a folder deleted and
+                # another one added in the same burst can share it
+                if old_name is not None and all(
+                    gone[old_name].get(key) == stat[key] for key in RENAME_KEYS
+                ):
+                    del inodes[stat["inode"]]
+                    renamed.append((old_name, name))
+                    continue
+                folder_name, movie = self._create_movie(name)
+            except OSError as e:
+                # e.g. renamed onto a folder that exists, the rest still syncs
+                print(f"Couldn't sync {name}: {e}")
+                continue
+            if folder_name in known:
+                continue
+            new_movies[folder_name] = movie
+            added.append(folder_name)
+        renamed_from = {old_name for old_name, _ in renamed}
+        removed = [name for name in known - entries.keys() if name not in renamed_from]
+
+        with self.lock:
+            for name in removed:
+                self.movies.pop(name, None)
+                self.manifest.pop(name, None)
+                self.index.remove(name)
+                self.removed.add(name)
+            for old_name, name in renamed:
+                movie = self.movies.pop(old_name, None)
+                if movie is None:
+                    continue
+                movie.path = os.path.join(self.path, name)
+                self.movies[name] = movie
+                self.manifest.pop(old_name, None)
+                self.manifest[name] = self._stat_path(movie.path)
+                self.index.remove(old_name)
+                self.index.add(name, movie)
+                self.removed.add(old_name)
+                self.dirty.add(name)
+            for name, movie in new_movies.items():
+                # out of the manifest until enriched, like add_movie(enriched=False)
+                self.movies[name] = movie
+                self.manifest.pop(name, None)
+                self.index.add(name, movie)
+                self.dirty.add(name)
+            if added or removed or renamed:
+                self.version += 1
+        if added or removed or renamed:
+            self.save_new_info()
+        return added, removed, renamed
+
+    def enrich_movies(self, folder_names):
+        # tmdb info, posters and credits of movies sync_movies added,
+        # called off the watcher thread once the views have them
+        with self.lock:
+            names = [name for name in folder_names if name in self.movies]
+        enriched = self._enrich_names(names)
+        self.save_new_info()
+        return enriched
+
+    def _enrich_names(self, names):
+        # only the movies enriched without an error count as up to date,
+        # the rest are tried again on the next scan. Returns the enriched ones
+        with self.lock:
+            movies = [self.movies[name] for name in names]
+        updated = {id(movie) for movie in self.update_movie_info(movies=movies)}
+        enriched = [name for name, movie in zip(names, movies) if id(movie) in updated]
+        self.update_manifest(enriched)
+        self.enrich_failed([name for name, movie in zip(names, movies) if id(movie) not in updated])
+        return enriched
+
+    def enrich_failed(self, folder_names):
+        # out of the manifest, so the next scan enriches them again
+        with self.lock:
+            for name in folder_names:
+                if self.manifest.pop(name, None) is not None:
+                    self.dirty.add(name)
+
+    def _stat_entry(self, entry):
+        return self._stat_path(entry.path, entry.stat())
+
+    def _stat_path(self, path, stat=None):
+        if stat is None:
+            stat = os.stat(path)
+        return {
+            "path": path,
+            "mtime": stat.st_mtime_ns,
+            "inode": stat.st_ino,
+            "size": stat.st_size,
+            "device": stat.st_dev,
+            "dir": S_ISDIR(stat.st_mode),
+        }
 
     def _process_movie(self, ent_name):
         ent_path = os.path.join(self.path, ent_name)
@@ -118,50 +408,85 @@ class FolderManager:
         return Path(new_folder_path).name
 
     def reset_movie_info(self):
-        self.movies: dict[str, Movie] = {}
-        for folder_name in os.listdir(self.path):
-            info = self._get_info_from_name(folder_name)
-            info["path"] = os.path.join(self.path, folder_name)
-            self.movies[info["title"]] = Movie(info)
-            self.movies[info["title"]]._save_info_to_file()
+        movies, manifest = {}, {}
+        with os.scandir(self.path) as it:
+            entries = list(it)
+        infos = NameParser.parse_names([entry.name for entry in entries])
+        for entry, info in zip(entries, infos):
+            info.pop("group", None)
+            info["path"] = entry.path
+            movies[entry.name] = Movie(info)
+            manifest[entry.name] = self._stat_entry(entry)
+        with self.lock:
+            self.removed.update(self.movies)
+            self.movies: dict[str, Movie] = movies
+            self.manifest = manifest
+            self.index.rebuild(movies)
+            self.dirty = set(movies)
+            self.version += 1
+        self.save_new_info()
 
-    def update_movie_info(self, force=False):
-        for movie in self.movies.values():
-            movie.update_movie(force=force)
+    def update_movie_info(self, force=False, workers=ENRICH_WORKERS, movies=None):
+        # returns the movies updated without an error
+        if movies is None:
+            movies = self.get_movies()
+        if not movies:
+            return []
+        if workers <= 1:
+            results = [self._update_movie(movie, force) for movie in movies]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(
+                    executor.map(lambda movie: self._update_movie(movie, force), movies)
+                )
+        self._movies_updated(movies)
+        return [movie for movie, ok in zip(movies, results) if ok]
+
+    def _update_movie(self, movie, force=False):
+        # one failing movie shouldn't stop the rest of the batch
+        try:
+            with Instrumentation.span("enrich movie"):
+                movie.update_movie(force=force)
+            return True
+        except Exception as e:
+            print(f"Couldn't update {movie.title}: {e}")
+            return False
+
+    def update_posters(self, force=False, size=ApiController.POSTER_SIZE, workers=POSTER_WORKERS):
+        # returns the movies whose poster was written
+        def update(movie):
+            try:
+                return movie.update_poster(force=force, size=size)
+            except Exception as e:
+                print(f"Couldn't get poster for {movie.title}: {e}")
+                return False
+
+        movies = self.get_movies()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(update, movies))
+        updated = [movie for movie, written in zip(movies, results) if written]
+        self._movies_updated(updated)
+        return updated
+
+    def movie_updated(self, movie):
+        self._movies_updated([movie])
+
+    def _movies_updated(self, movies):
+        with self.lock:
+            for movie in movies:
+                name = self.index.keys.get(id(movie))
+                if name is not None:
+                    self.dirty.add(name)
+            self.index.refresh(movies)
+            self.version += 1
 
     def rename(self):
         pass
 
-    def _get_info_from_file(self, path) -> dict:
-        with open(path) as f:
-            return json.load(f)
-
-    def _write_to_file(self, path, data):
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-
     def _get_info_from_name(self, file_name) -> dict:
-        year_match = re.search(r"(?:^|\D)(19\d{2}|20\d{2})(?:\D|$)", file_name)
-        if year_match:
-            year = int(year_match.group(1))
-        else:
-            year = "unknown"
-        parts = re.split(r" \(|\.|\[", file_name)
-        match = re.search(r"^(.*?)[ ]*(?=\d{4})", file_name)
-        if match:
-            parts2 = match.group(1)
-        else:
-            parts2 = file_name
-        if len(parts[0]) < len(parts2):
-            title = parts[0]
-        else:
-            title = parts2
-        res = re.search(r"\[(.*?)\]", file_name)
-        if res:
-            res = res.group(1)
-        else:
-            res = "-"
-        info = {"title": title, "year": year, "resolution": res}
+        with Instrumentation.span("parse name"):
+            info = NameParser.parse_name(file_name)
+        info.pop("group", None)
         return info
 
     def remove_images(self):
@@ -173,47 +498,80 @@ class FolderManager:
             for img in images:
                 os.remove(img)
 
-    def save_images(self):
-        num_frames = 5
-
-        for movie_folder in os.listdir(self.path):
-            movie_folder_path = os.path.join(self.path, movie_folder)
-            movie_folder_list = os.listdir(movie_folder_path)
-            for file in movie_folder_list:
-                if file.endswith((".mp4", ".avi", ".mkv")):
-                    video_path = os.path.join(movie_folder_path, file)
-                    images_folder = os.path.join(movie_folder_path, "images")
-                    os.makedirs(images_folder, exist_ok=True)
-                    cap = cv2.VideoCapture(str(video_path))
-
-                    if not cap.isOpened():
-                        print(f"Failed to open {file}")
-                        continue
-
-                    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                    if frame_count > 10000:
-                        selected_frames = random.sample(
-                            range(1000, frame_count - 1000), num_frames
-                        )
-                    else:
-                        selected_frames = random.sample(
-                            range(frame_count), min(num_frames, frame_count)
-                        )
-                    selected_frames = sorted(selected_frames)
-                    base_name = movie_folder.split(" (")[0]
-
-                    for i, frame_num in enumerate(selected_frames):
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-                        ret, frame = cap.read()
-                        if ret:
-                            frame_name = f"{base_name}_frame{i}.jpg"
-                            print(frame_name)
-
-                            cv2.imwrite(os.path.join(images_folder, frame_name), frame)
-
-                    cap.release()
+    def probe_videos(self, workers=VideoProbe.PROBE_WORKERS):
+        # reads real video properties, files probed before come from the cache.
+        # Returns the movies whose info changed
+        cache = VideoProbe.ProbeCache()
+        movies = self.get_movies()
+
+        def probe(movie):
+            video_path = VideoProbe.find_video(movie.path)
+            if video_path is None:
+                return None
+            try:
+                with Instrumentation.span("probe video"):
+                    return cache.probe(video_path)
+            except OSError as e:
+                print(f"Couldn't probe {movie.title}: {e}")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(probe, movies))
+        cache.save()
+
+        probed = []
+        with self.lock:
+            for movie, video_info in zip(movies, results):
+                if video_info:
+                    resolution = VideoProbe.resolution_name(
+                        video_info["width"], video_info["height"]
+                    )
+                    if resolution is None:
+                        continue  # unreadable probe, the name's resolution stays
+                    # the cache holds the raw fourcc
+                    codec = VideoProbe.codec_name(video_info["codec"])
+                    video_info = dict(video_info, codec=codec)
+                    if movie.res == resolution and all(
+                        movie.info.get(key) == value for key, value in video_info.items()
+                    ):
+                        continue  # probed on an earlier run, the row is current
+                    movie.update_video_info(video_info, resolution)
+                    probed.append(movie)
+        self._movies_updated(probed)
+        return probed
+
+    def save_images(self, force=False, workers=None):
+        # one movie per worker process, returns folder : (frames, seconds).
+        # multiprocessing and the frame extractor are only loaded here, both
+        # are slow imports
+        from concurrent.futures import ProcessPoolExecutor
+        import FrameExtractor
+
+        timings = {}
+        folders = [entry.path for entry in self.scan() if entry.is_dir()]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(FrameExtractor.extract_frames, folder, force=force)
+                for folder in folders
+            ]
+            for future in as_completed(futures):
+                try:
+                    folder, frames, seconds = future.result()
+                except Exception as e:
+                    print(f"Frame extraction failed: {e}")
+                    continue
+                timings[Path(folder).name] = (frames, seconds)
+                Instrumentation.observe("extract frames", seconds)
+                Instrumentation.count("frames written", frames)
+                if frames:
+                    print(f"{Path(folder).name}: {frames} frames in {seconds:.2f}s")
+        return timings
 
 
 if __name__ == "__main__":
-    fm = FolderManager()
+    import sys
+
+    if len(sys.argv) != 2:
+        sys.exit("usage: FolderManager.py DIRECTORY, see LibraryCli.py for more")
+    fm = FolderManager(sys.argv[1])
     fm.update_movie_info(force=True)
+    fm.save_new_info()
@@ -0,0 +1,105 @@
+import os, sys, select, threading, ctypes, ctypes.util
+
+DEBOUNCE = 2.0  # seconds without events before changes are applied
+POLL_INTERVAL = 5.0
+
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+def _inotify_init(path):
+    # returns an inotify fd watching path, or None when inotify isn't available
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(path), WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+class FolderWatcher(threading.Thread):
+    # calls callback once a burst of changes in path has settled
+    def __init__(self, path, callback, debounce=DEBOUNCE, poll_interval=POLL_INTERVAL):
+        super().__init__(daemon=True)
+        self.path = path
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        fd = _inotify_init(self.path)
+        try:
+            if fd is None:
+                self._poll()
+            else:
+                self._watch(fd)
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def _notify(self):
+        try:
+            self.callback()
+        except Exception as e:
+            print(f"Couldn't apply folder changes: {e}")
+
+    def _watch(self, fd):
+        while not self.stop_event.is_set():
+            if not self._read_events(fd, self.poll_interval):
+                continue
+            while self._read_events(fd, self.debounce):
+                if self.stop_event.is_set():
+                    return
+            self._notify()
+
+    def _read_events(self, fd, timeout):
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            while os.read(fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def _poll(self):
+        snapshot = self._snapshot()
+        while not self.stop_event.wait(self.poll_interval):
+            current = self._snapshot()
+            if current == snapshot:
+                continue
+            while not self.stop_event.wait(self.debounce):
+                settled = self._snapshot()
+                if settled == current:
+                    break
+                current = settled
+            if self.stop_event.is_set():
+                return
+            snapshot = current
+            self._notify()
+
+    def _snapshot(self):
+        try:
+            with os.scandir(self.path) as it:
+                return {e.name: e.stat().st_mtime_ns for e in it}
+        except OSError:
+            return {}
@@ -0,0 +1,88 @@
+import os, time
+from NameParser import is_video
+
+NUM_FRAMES = 5
+FRAME_WIDTH = 640  # frames are only shown as thumbnails
+JPEG_QUALITY = 85
+SKIP_EDGES = 0.1  # part of the video skipped at the start and the end
+
+
+def has_frames(images_folder):
+    try:
+        return any("_frame" in image for image in os.listdir(images_folder))
+    except OSError:
+        return False
+
+
+def pick_times(duration_ms, num_frames):
+    # evenly spread over the video, away from intros and credits
+    span = duration_ms * (1 - 2 * SKIP_EDGES)
+    return [
+        duration_ms * SKIP_EDGES + span * (i + 0.5) / num_frames
+        for i in range(num_frames)
+    ]
+
+
+def extract_frames(
+    movie_folder_path, num_frames=NUM_FRAMES, width=FRAME_WIDTH, force=False
+):
+    # runs in a worker process, returns (folder, frames written, seconds)
+    start = time.perf_counter()
+    images_folder = os.path.join(movie_folder_path, "images")
+    if not force and has_frames(images_folder):
+        return movie_folder_path, 0, time.perf_counter() - start
+
+    written = 0
+    base_name = os.path.basename(movie_folder_path).split(" (")[0]
+    for file in sorted(os.listdir(movie_folder_path)):
+        if is_video(file):
+            video_path = os.path.join(movie_folder_path, file)
+            os.makedirs(images_folder, exist_ok=True)
+            written += _extract_from_video(
+                video_path, images_folder, base_name, num_frames, width
+            )
+    return movie_folder_path, written, time.perf_counter() - start
+
+
+def _extract_from_video(video_path, images_folder, base_name, num_frames, width):
+    import cv2  # only the worker processes decode video
+
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        print(f"Failed to open {os.path.basename(video_path)}")
+        return 0
+
+    written = 0
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        if fps > 0 and frame_count > 0:
+            positions = pick_times(frame_count / fps * 1000, num_frames)
+            prop = cv2.CAP_PROP_POS_MSEC
+        else:
+            positions = [0]
+            prop = cv2.CAP_PROP_POS_FRAMES
+
+        # ascending positions, one seek each, and only the wanted frame
+        # is converted out of the decoder
+        for i, position in enumerate(positions):
+            cap.set(prop, position)
+            if not cap.grab():
+                continue
+            ret, frame = cap.retrieve()
+            if not ret:
+                continue
+            height, frame_width = frame.shape[:2]
+            if frame_width > width:
+                size = (width, max(1, int(height * width / frame_width)))
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            frame_name = f"{base_name}_frame{i}.jpg"
+            cv2.imwrite(
+                os.path.join(images_folder, frame_name),
+                frame,
+                [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY],
+            )
+            written += 1
+    finally:
+        cap.release()
+    return written
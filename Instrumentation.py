@@ -0,0 +1,146 @@
+import os, json, time, bisect, threading
+
+# upper bounds in milliseconds, the last bucket takes everything slower
+BUCKETS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+METRICS_FILE = "metrics.json"
+
+enabled = os.environ.get("MOVIES_METRICS") == "1"
+_lock = threading.Lock()
+_counters = {}  # name : count
+_timers = {}  # name : Histogram
+
+
+class Histogram:
+    # latencies of one span, bucketed so percentiles stay cheap
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.count += 1
+        self.total += ms
+        self.min = min(self.min, ms)
+        self.max = max(self.max, ms)
+        self.buckets[bisect.bisect_left(BUCKETS, ms)] += 1
+
+    def percentile(self, p):
+        # upper bound of the bucket holding the p-th percentile
+        wanted = p / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted and count:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0,
+            "min_ms": round(self.min, 3) if self.count else 0,
+            "max_ms": round(self.max, 3),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "buckets": {
+                (f"<={bound}" if i < len(BUCKETS) else f">{BUCKETS[-1]}"): count
+                for i, (bound, count) in enumerate(zip(BUCKETS + (None,), self.buckets))
+                if count
+            },
+        }
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    # handed out while disabled, entering and leaving it does nothing
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+def span(name):
+    # with span("scan"): ... times the block into the "scan" histogram
+    return _Span(name) if enabled else _NO_SPAN
+
+
+def observe(name, seconds):
+    if not enabled:
+        return
+    with _lock:
+        histogram = _timers.get(name)
+        if histogram is None:
+            histogram = _timers[name] = Histogram()
+        histogram.add(seconds)
+
+
+def count(name, amount=1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timers.clear()
+
+
+def snapshot():
+    with _lock:
+        return {
+            "enabled": enabled,
+            "counters": dict(sorted(_counters.items())),
+            "timers": {name: _timers[name].to_dict() for name in sorted(_timers)},
+        }
+
+
+def summary():
+    # one line per timer and counter, for the diagnostics panel
+    data = snapshot()
+    lines = [f"{'span':<32}{'count':>8}{'mean ms':>10}{'p50':>8}{'p95':>8}{'max ms':>10}"]
+    for name, timer in data["timers"].items():
+        lines.append(
+            f"{name:<32}{timer['count']:>8}{timer['mean_ms']:>10.2f}"
+            f"{timer['p50_ms']:>8}{timer['p95_ms']:>8}{timer['max_ms']:>10.2f}"
+        )
+    lines.append("")
+    lines += [f"{name:<32}{value:>8}" for name, value in data["counters"].items()]
+    return "\n".join(lines)
+
+
+def save(path=METRICS_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,193 @@
+import os, sys, json, argparse
+from collections import Counter
+import Instrumentation
+from Catalog import Catalog, CATALOG_FILE
+from FolderManager import FolderManager, ENRICH_WORKERS
+from MovieIndex import FILTER_METHODS
+from FilterExpression import FilterSyntaxError
+
+# library maintenance without the gui, e.g. from cron:
+#   python LibraryCli.py scan ~/Movies
+#   python LibraryCli.py enrich
+#   python LibraryCli.py query 'year > 2000 and director contains nolan'
+# Only the commands that need them import requests, opencv or the gui stack
+TOP_COUNT = 10  # rows of the per director table in stats
+
+
+def open_library(args):
+    # the directory from the command line or the one the catalog was built for
+    catalog = Catalog(args.catalog)
+    catalog.import_json()
+    if args.directory:
+        directory = os.path.abspath(args.directory)
+    else:
+        directory = catalog.get_meta("dir")
+    if directory is None:
+        sys.exit("No library directory, pass one or run scan DIRECTORY first")
+    if not os.path.isdir(directory):
+        sys.exit(f"{directory} is not a directory")
+    fm = FolderManager(directory, scan=False, catalog=catalog, snapshot=True)
+    fm.load_catalog()  # when the snapshot was missing or out of date
+    return fm
+
+
+def cmd_scan(args):
+    # new and changed folders are parsed from their names, enrich fetches the rest
+    fm = open_library(args)
+    known = set(fm.movies)
+    pending, removed = fm.create_movies(enrich=False)
+    print(
+        f"{len(fm.movies)} movies, {len(fm.movies.keys() - known)} new, "
+        f"{len(removed)} removed, {len(pending)} waiting for enrich"
+    )
+    fm.save_snapshot()  # the gui starts from it
+
+
+def cmd_enrich(args):
+    # the same stages as the gui: tmdb lookup, poster, credits, video probe
+    from Pipeline import LibraryPipeline
+
+    fm = open_library(args)
+    pipeline = LibraryPipeline(fm, workers=args.workers, force=args.force)
+    pipeline.run()
+    totals = Counter()
+    while not pipeline.events.empty():
+        kind, payload = pipeline.events.get_nowait()
+        if kind in ("scanned", "enriching", "removed", "probed"):
+            totals[kind] = payload
+        elif kind in ("parsed", "enriched"):
+            totals[kind] += 1
+    print(
+        f"{totals['parsed']} movies, {totals['removed']} removed, "
+        f"{totals['enriched']}/{totals['enriching']} enriched, {totals['probed']} probed"
+    )
+    if args.posters:
+        updated = fm.update_posters(force=True)
+        fm.save_snapshot()
+        print(f"{len(updated)} posters updated")
+
+
+def cmd_extract_frames(args):
+    fm = open_library(args)
+    timings = fm.save_images(force=args.force, workers=args.workers)
+    frames = sum(frames for frames, _ in timings.values())
+    print(f"{frames} frames from {len(timings)} folders")
+
+
+def cmd_filter(args):
+    fm = open_library(args)
+    print_movies(fm.apply_filter(args.field, args.method, args.value), args.json)
+
+
+def cmd_query(args):
+    fm = open_library(args)
+    try:
+        movies = fm.apply_expression(args.expression)
+    except FilterSyntaxError as e:
+        print(f"Invalid filter: {e}", file=sys.stderr)
+        return 1
+    print_movies(movies, args.json)
+
+
+def print_movies(movies, as_json=False):
+    if as_json:
+        json.dump([movie.to_dict() for movie in movies], sys.stdout, indent=2)
+        print()
+        return
+    for movie in movies:
+        print(f"{movie.title} ({movie.year}) [{movie.res}]  {movie.path}")
+    print(f"{len(movies)} movies")
+
+
+def cmd_stats(args):
+    fm = open_library(args)
+    movies = fm.get_movies()
+    years = [movie.year for movie in movies if isinstance(movie.year, int)]
+    stats = {
+        "directory": fm.path,
+        "movies": len(movies),
+        "enriched": sum(movie.id != "-" for movie in movies),
+        "with director": sum(movie.director != "-" for movie in movies),
+        "up to date": len(fm.manifest),
+        "years": [min(years), max(years)] if years else None,
+        "resolutions": dict(Counter(movie.res for movie in movies).most_common()),
+        "decades": dict(sorted(Counter(f"{year // 10 * 10}s" for year in years).items())),
+        "directors": dict(
+            Counter(
+                movie.director for movie in movies if movie.director != "-"
+            ).most_common(TOP_COUNT)
+        ),
+    }
+    if args.json:
+        json.dump(stats, sys.stdout, indent=2)
+        print()
+        return
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            print(f"{key}:")
+            for name, count in value.items():
+                print(f"  {name:<30}{count:>8}")
+        else:
+            print(f"{key:<32}{value}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Movies manager without the gui")
+    parser.add_argument("--catalog", default=CATALOG_FILE, help="catalog database")
+    parser.add_argument(
+        "--metrics", action="store_true", help="print spans and counters at the end"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def command(name, handler, help):
+        sub = commands.add_parser(name, help=help)
+        sub.add_argument(
+            "directory", nargs="?", help="library, defaults to the catalog's"
+        )
+        sub.set_defaults(handler=handler)
+        return sub
+
+    command("scan", cmd_scan, "sync the catalog with the library folder")
+
+    enrich = command("enrich", cmd_enrich, "fetch tmdb info, posters and credits")
+    enrich.add_argument("--force", action="store_true", help="refetch every movie")
+    enrich.add_argument("--workers", type=int, default=ENRICH_WORKERS)
+    enrich.add_argument(
+        "--posters", action="store_true", help="refresh posters that changed on tmdb"
+    )
+
+    frames = command("extract-frames", cmd_extract_frames, "save frames from the videos")
+    frames.add_argument("--force", action="store_true", help="replace existing frames")
+    frames.add_argument("--workers", type=int, default=None, help="processes")
+
+    single = commands.add_parser("filter", help="movies matching one filter")
+    single.add_argument("field", help="title, year, resolution, director, ...")
+    single.add_argument("method", choices=FILTER_METHODS)
+    single.add_argument("value")
+    single.add_argument("--directory", help="library, defaults to the catalog's")
+    single.add_argument("--json", action="store_true", help="full info as json")
+    single.set_defaults(handler=cmd_filter)
+
+    query = commands.add_parser("query", help="movies matching a filter expression")
+    query.add_argument("expression", help="e.g. 'year > 2000 and title contains war'")
+    query.add_argument("--directory", help="library, defaults to the catalog's")
+    query.add_argument("--json", action="store_true", help="full info as json")
+    query.set_defaults(handler=cmd_query)
+
+    stats = command("stats", cmd_stats, "counts per resolution, decade and director")
+    stats.add_argument("--json", action="store_true")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.metrics:
+        Instrumentation.enable()
+    status = args.handler(args)
+    if args.metrics:
+        print(Instrumentation.summary())
+    return status or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+import bisect
+from collections import defaultdict
+
+NGRAM = 3
+FILTER_METHODS = ("equals", "greater than", "less than", "contains")
+MISSING = object()
+
+
+def field_value(item, field):
+    # what a filter on field sees, MISSING when the movie has no such field.
+    # The cast is kept as person ids, filters see it expanded as it was saved
+    if field == "cast":
+        return MISSING if item.cast_ids is None else str(item.cast)
+    return item.info.get(field, MISSING)
+
+
+def matches(item, filter_type, filter_method, filter_value):
+    # reference semantics of a single filter, the index must agree with it
+    item_value = field_value(item, filter_type)
+    if item_value is MISSING:
+        return False
+
+    try:
+        if isinstance(item_value, (int, float)):
+            filter_value_converted = int(filter_value)
+        else:
+            filter_value_converted = filter_value
+    except ValueError:
+        item_value = str(item_value)
+        filter_value_converted = filter_value
+
+    if filter_method == "equals":
+        return str(item_value) == str(filter_value_converted)
+    elif filter_method == "greater than":
+        return (
+            isinstance(item_value, (int, float))
+            and item_value > filter_value_converted
+        )
+    elif filter_method == "less than":
+        return (
+            isinstance(item_value, (int, float))
+            and item_value < filter_value_converted
+        )
+    elif filter_method == "contains":
+        return str(filter_value_converted).lower() in str(item_value).lower()
+    return False
+
+
+def filter_movies(movies, filter_type, filter_method, filter_value):
+    return [
+        item
+        for item in movies
+        if matches(item, filter_type, filter_method, filter_value)
+    ]
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _is_number(value):
+    return isinstance(value, (int, float))
+
+
+def _ngrams(text):
+    return {text[i : i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class TextIndex:
+    # n-gram inverted index over the distinct lowercased values of a field
+    def __init__(self):
+        self.keys = defaultdict(set)  # text : movie keys
+        self.grams = defaultdict(set)  # ngram : texts
+
+    def add(self, text, key):
+        if text not in self.keys:
+            for gram in _ngrams(text):
+                self.grams[gram].add(text)
+        self.keys[text].add(key)
+
+    def remove(self, text, key):
+        keys = self.keys[text]
+        keys.discard(key)
+        if keys:
+            return
+        del self.keys[text]
+        for gram in _ngrams(text):
+            self.grams[gram].discard(text)
+            if not self.grams[gram]:
+                del self.grams[gram]
+
+    def estimate(self, query):
+        # upper bound from the shortest posting list of the query
+        if len(query) < NGRAM:
+            return sum(len(keys) for keys in self.keys.values())
+        texts = min(
+            (self.grams.get(gram, ()) for gram in _ngrams(query)), key=len
+        )
+        return sum(len(self.keys[text]) for text in texts)
+
+    def contains(self, query):
+        if len(query) < NGRAM:
+            texts = self.keys
+        else:
+            candidates = []
+            for gram in _ngrams(query):
+                if gram not in self.grams:
+                    return set()
+                candidates.append(self.grams[gram])
+            candidates.sort(key=len)
+            texts = set.intersection(*candidates)
+        result = set()
+        for text in texts:
+            if query in text:
+                result |= self.keys[text]
+        return result
+
+
+class FieldIndex:
+    # numbers and strings are kept apart because filters treat them differently
+    def __init__(self):
+        self.values = {}  # key : indexed value
+        self.sorted_values = []
+        self.sorted_keys = []
+        self.number_equal = defaultdict(set)  # str(value) : keys
+        self.text_equal = defaultdict(set)
+        self.number_text = TextIndex()
+        self.text = TextIndex()
+
+    def extend(self, items):
+        # bulk load of (key, value) pairs, sorting once instead of per insert
+        numbers = []
+        for key, value in items:
+            self.add(key, value, insort=False)
+            if _is_number(value):
+                numbers.append((value, key))
+        numbers.extend(zip(self.sorted_values, self.sorted_keys))
+        numbers.sort(key=lambda pair: pair[0])
+        self.sorted_values = [value for value, _ in numbers]
+        self.sorted_keys = [key for _, key in numbers]
+
+    def add(self, key, value, insort=True):
+        self.values[key] = value
+        text = str(value)
+        if _is_number(value):
+            if insort:
+                i = bisect.bisect_right(self.sorted_values, value)
+                self.sorted_values.insert(i, value)
+                self.sorted_keys.insert(i, key)
+            self.number_equal[text].add(key)
+            self.number_text.add(text.lower(), key)
+        else:
+            self.text_equal[text].add(key)
+            self.text.add(text.lower(), key)
+
+    def remove(self, key):
+        value = self.values.pop(key)
+        text = str(value)
+        if _is_number(value):
+            lo = bisect.bisect_left(self.sorted_values, value)
+            hi = bisect.bisect_right(self.sorted_values, value)
+            i = self.sorted_keys.index(key, lo, hi)
+            del self.sorted_values[i]
+            del self.sorted_keys[i]
+            self._discard(self.number_equal, text, key)
+            self.number_text.remove(text.lower(), key)
+        else:
+            self._discard(self.text_equal, text, key)
+            self.text.remove(text.lower(), key)
+
+    def equals(self, value):
+        number = _to_int(value)
+        number_text = str(number) if number is not None else str(value)
+        return self.text_equal.get(str(value), set()) | self.number_equal.get(
+            number_text, set()
+        )
+
+    def greater_than(self, value):
+        number = _to_int(value)
+        if number is None:
+            return set()
+        return set(self.sorted_keys[bisect.bisect_right(self.sorted_values, number) :])
+
+    def less_than(self, value):
+        number = _to_int(value)
+        if number is None:
+            return set()
+        return set(self.sorted_keys[: bisect.bisect_left(self.sorted_values, number)])
+
+    def contains(self, value):
+        number = _to_int(value)
+        number_text = str(number) if number is not None else str(value)
+        return self.text.contains(str(value).lower()) | self.number_text.contains(
+            number_text.lower()
+        )
+
+    def estimate(self, filter_method, filter_value):
+        number = _to_int(filter_value)
+        number_text = str(number) if number is not None else str(filter_value)
+        if filter_method == "equals":
+            return len(self.text_equal.get(str(filter_value), ())) + len(
+                self.number_equal.get(number_text, ())
+            )
+        elif filter_method == "greater than" and number is not None:
+            return len(self.sorted_values) - bisect.bisect_right(
+                self.sorted_values, number
+            )
+        elif filter_method == "less than" and number is not None:
+            return bisect.bisect_left(self.sorted_values, number)
+        elif filter_method == "contains":
+            return self.text.estimate(
+                str(filter_value).lower()
+            ) + self.number_text.estimate(number_text.lower())
+        return 0
+
+    def query(self, filter_method, filter_value):
+        if filter_method == "equals":
+            return self.equals(filter_value)
+        elif filter_method == "greater than":
+            return self.greater_than(filter_value)
+        elif filter_method == "less than":
+            return self.less_than(filter_value)
+        elif filter_method == "contains":
+            return self.contains(filter_value)
+        return set()
+
+    @staticmethod
+    def _discard(index, text, key):
+        keys = index[text]
+        keys.discard(key)
+        if not keys:
+            del index[text]
+
+
+class MovieIndex:
+    # field indexes are built on the first query of a field and kept current.
+    # With a pushdown, the first query of a field goes to it instead, so a
+    # one-off query doesn't pay for an index it won't use again
+    def __init__(self, pushdown=None):
+        self.movies = {}  # key : movie
+        self.keys = {}  # id(movie) : key
+        self.order = {}  # key : position, results keep the library order
+        self.fields: dict[str, FieldIndex] = {}
+        self.counter = 0
+        self.watchers = []  # called with the movies refresh re-read
+        self.pushdown = pushdown  # (field, method, value) -> keys, or None if it can't
+        self.pushed = set()  # fields the pushdown answered once
+
+    def rebuild(self, movies):
+        self.movies = {}
+        self.keys = {}
+        self.order = {}
+        self.fields = {}
+        for key, movie in movies.items():
+            self.add(key, movie)
+
+    def add(self, key, movie):
+        if key in self.movies:
+            self.remove(key)
+        self.movies[key] = movie
+        self.keys[id(movie)] = key
+        self.order[key] = self.counter
+        self.counter += 1
+        for field, index in self.fields.items():
+            value = field_value(movie, field)
+            if value is not MISSING:
+                index.add(key, value)
+
+    def remove(self, key):
+        movie = self.movies.pop(key, None)
+        if movie is None:
+            return
+        del self.keys[id(movie)]
+        del self.order[key]
+        for index in self.fields.values():
+            if key in index.values:
+                index.remove(key)
+
+    def refresh(self, movies):
+        # re-reads the info of movies that changed in place
+        for movie in movies:
+            key = self.keys.get(id(movie))
+            if key is None:
+                continue
+            for field, index in self.fields.items():
+                if key in index.values:
+                    index.remove(key)
+                value = field_value(movie, field)
+                if value is not MISSING:
+                    index.add(key, value)
+        for watcher in self.watchers:
+            watcher(movies)
+
+    def size(self):
+        return len(self.movies)
+
+    def all_keys(self):
+        return set(self.movies)
+
+    def estimate(self, filter_type, filter_method, filter_value):
+        if self._may_push_down(filter_type):
+            return self.size()  # unknown without an index, planned last
+        return self._field(filter_type).estimate(filter_method, filter_value)
+
+    def query_keys(self, filter_type, filter_method, filter_value):
+        if self._may_push_down(filter_type):
+            self.pushed.add(filter_type)
+            keys = self.pushdown(filter_type, filter_method, filter_value)
+            if keys is not None:
+                return keys & self.movies.keys()
+        return self._field(filter_type).query(filter_method, filter_value)
+
+    def _may_push_down(self, field):
+        return (
+            self.pushdown is not None
+            and field not in self.fields
+            and field not in self.pushed
+        )
+
+    def query(self, filter_type, filter_method, filter_value):
+        return self.to_movies(self.query_keys(filter_type, filter_method, filter_value))
+
+    def to_movies(self, keys):
+        return [self.movies[key] for key in sorted(keys, key=self.order.__getitem__)]
+
+    def _field(self, field):
+        index = self.fields.get(field)
+        if index is None:
+            index = FieldIndex()
+            values = ((key, field_value(movie, field)) for key, movie in self.movies.items())
+            index.extend((key, value) for key, value in values if value is not MISSING)
+            self.fields[field] = index
+        return index
@@ -1,40 +1,172 @@
-import requests, os, json
-import ApiController
+import os, sys, threading
+from collections.abc import Mapping
+import ApiController, Instrumentation
+
+HIDDEN_FIELDS = frozenset(("api", "cast", "screenplay", "path"))
+INTERNED_FIELDS = ("resolution", "codec")  # few distinct values, shared by all movies
+
+
+class PersonTable:
+    # every person is stored once, movies only keep ids
+    def __init__(self):
+        self.ids = {}  # name : id
+        self.people = []  # id : (name, gender)
+        self.lock = threading.Lock()
+
+    def add(self, name, gender=None):
+        with self.lock:
+            person_id = self.ids.get(name)
+            if person_id is None:
+                person_id = len(self.people)
+                name = sys.intern(name)
+                self.ids[name] = person_id
+                self.people.append((name, gender))
+            elif gender is not None and self.people[person_id][1] is None:
+                self.people[person_id] = (self.people[person_id][0], gender)
+            return person_id
+
+    def get(self, person_id):
+        return self.people[person_id]
+
+    def intern(self, name):
+        # the table's copy of the name, so equal names share one string
+        return self.people[self.add(name)][0]
+
+    def merge(self, entries):
+        # (name, gender) entries of a saved table, returns their ids in this
+        # one or None when the saved ids hold as they are
+        with self.lock:
+            if not self.people:
+                self.people = list(entries)
+                self.ids = {name: i for i, (name, _) in enumerate(self.people)}
+                return None
+        return [self.add(name, gender) for name, gender in entries]
+
+    def __len__(self):
+        return len(self.people)
+
+
+people = PersonTable()
+# a Movie's info is copy on write: writers swap in an updated copy under
+# this lock, so two writers don't lose each other's change. Readers, the tk
+# thread and the saves, use the dict they got without locking, it never
+# changes once a Movie holds it
+info_lock = threading.Lock()
+
+
+class DisplayView(Mapping):
+    # read-only view of a movie's info without the hidden fields, nothing is copied
+    __slots__ = ("info",)
+
+    def __init__(self, info):
+        self.info = info
+
+    def __getitem__(self, key):
+        if key in HIDDEN_FIELDS:
+            raise KeyError(key)
+        return self.info[key]
+
+    def __iter__(self):
+        return (key for key in self.info if key not in HIDDEN_FIELDS)
+
+    def __len__(self):
+        return len(self.info) - sum(1 for key in HIDDEN_FIELDS if key in self.info)
+
+    def __repr__(self):
+        return f"DisplayView({dict(self)!r})"
 
 
 class Movie:
+    # self.info is the only copy of the data, the attributes below read from it.
+    # The cast is kept apart as (person id, character) pairs
+    __slots__ = ("info", "cast_ids")
+
     def __init__(self, info):
-        self.year = int(info.get("year", 0))
-        self.res = info.get("resolution", "-")
-        self.path = info.get("path", "-")
-        self.title = info.get("title", "-")
-        self.director = info.get("director", "-")
-        self.screenplay = info.get("screenplay", "-")
-        self.cast = info.get("cast", "-")
-        id = info.get("api", "-")
-        if id != "-":
-            self.id = info["api"].get("id", "-")
-            self.imdb_id = info["api"].get("imdb_id", "-")
-        else:
-            self.id = "-"
-            self.imdb_id = "-"
+        self.info = {sys.intern(key): value for key, value in info.items()}
+        if str(self.info["year"]).isdigit():
+            self.info["year"] = int(self.info["year"])  # names without one keep "unknown"
+        for field in INTERNED_FIELDS:
+            if isinstance(self.info.get(field), str):
+                self.info[field] = sys.intern(self.info[field])
+        if isinstance(self.info.get("director"), str):
+            self.info["director"] = people.intern(self.info["director"])
+        if isinstance(self.info.get("screenplay"), list):
+            self.info["screenplay"] = [people.intern(n) for n in self.info["screenplay"]]
+        cast = self.info.pop("cast", None)
+        self.cast_ids = self._cast_ids(cast) if isinstance(cast, list) else None
 
-        self.info = info
-        self.info["year"] = int(self.info["year"])
+    @classmethod
+    def restore(cls, info, cast_ids):
+        # a movie from a snapshot, its info is already in the compact form
+        movie = cls.__new__(cls)
+        movie.info = info
+        movie.cast_ids = cast_ids
+        return movie
+
+    @property
+    def year(self):
+        return self.info["year"]
+
+    @property
+    def res(self):
+        return self.info.get("resolution", "-")
+
+    @property
+    def path(self):
+        return self.info.get("path", "-")
+
+    @path.setter
+    def path(self, path):
+        with info_lock:
+            self.info = {**self.info, "path": path}
+
+    @property
+    def title(self):
+        return self.info.get("title", "-")
+
+    @property
+    def director(self):
+        return self.info.get("director", "-")
+
+    @property
+    def screenplay(self):
+        return self.info.get("screenplay", "-")
+
+    @property
+    def cast(self):
+        return self._expand_cast(self.cast_ids)
+
+    @property
+    def id(self):
+        api = self.info.get("api", "-")
+        return api.get("id", "-") if api != "-" else "-"
+
+    @property
+    def genres(self):
+        api = self.info.get("api", "-")
+        if api == "-":
+            return []
+        return [ApiController.GENRES.get(i, str(i)) for i in api.get("genre_ids") or []]
+
+    @property
+    def imdb_id(self):
+        api = self.info.get("api", "-")
+        return api.get("imdb_id", "-") if api != "-" else "-"
+
+    def to_dict(self):
+        # the info as it is saved, with the cast expanded again
+        info, cast_ids = self.info, self.cast_ids
+        if cast_ids is None:
+            return info
+        return {**info, "cast": self._expand_cast(cast_ids)}
 
     def update_movie(self, force=False):
         self.update_movie_info(force=force)
         self.update_poster()
-        self.update_cast_info(force=force)
-        self.get_imdb_link(force=force)
+        self.update_details(force=force)
 
     def displayable_info(self):
-        dis = self.info.copy()
-        dis.pop("api", None)
-        dis.pop("cast", None)
-        dis.pop("screenplay", None)
-        dis.pop("path", None)
-        return dis
+        return DisplayView(self.info)
 
     def get_image_path(self):
         if self._is_poster():
@@ -53,46 +185,65 @@ class Movie:
             return
         self._update_api_dict(movie_info)
 
-    def update_cast_info(self, force=False):
-        if self.info.get("director", "-") != "-" and not force:
+    def update_details(self, force=False):
+        if self.id == "-":
             return
-        cast_info = ApiController.get_cast_info(self.id)
-        if not cast_info:
-            print(f"Credits not found for {self.title}")
+        if self.director != "-" and self.imdb_id != "-" and not force:
             return
-        self._update_cast_dict(cast_info)
-
-    def get_imdb_link(self, force=False):
-        if self.imdb_id != "-" and not force:
+        details = ApiController.get_movie_details(self.id)
+        if not details:
+            print(f"Details not found for {self.title}")
             return
-        if self.info.get("api", "-") != "-":
-            if self.info["api"].get("imdb_id", "-") == "-":
-                imdb_id = ApiController.get_imdb_id(self.id)
-                self.info["api"]["imdb_id"] = imdb_id
-                self.imdb_id = imdb_id
+        if details.get("credits"):
+            self._update_cast_dict(details["credits"])
+        imdb_id = details.get("external_ids", {}).get("imdb_id") or details.get(
+            "imdb_id"
+        )
+        if imdb_id:
+            with info_lock:
+                api = {**self.info["api"], "imdb_id": imdb_id}
+                self.info = {**self.info, "api": api}
 
-    def update_poster(self, force=False):
+    def update_poster(self, force=False, size=ApiController.POSTER_SIZE):
+        # with force the poster is only downloaded again if it changed
+        # on the server or a different size is asked for
         if self._is_poster() and not force:
-            return
-        img = None
-        if self.info.get("api", None) is not None:
-            if self.info["api"].get("poster_path", None) is not None:
-                img = ApiController.get_poster(self.info["api"]["poster_path"])
-        if not img:
+            return False
+        api = self.info.get("api")
+        if not isinstance(api, dict) or not api.get("poster_path"):
             print(f"Could't get poster for {self.title}")
-            return
+            return False
         poster_path = self._get_poster_path()
         os.makedirs(os.path.dirname(poster_path), exist_ok=True)
-        with open(poster_path, "wb") as f:
-            f.write(img)
+        with Instrumentation.span("poster download"):
+            validators = ApiController.download_poster(
+                api["poster_path"], poster_path, size, api.get("poster")
+            )
+        if validators is None:
+            print(f"Could't get poster for {self.title}")
+            return False
+        changed = validators is not api.get("poster")
+        with info_lock:
+            api = {**self.info["api"], "poster": validators}
+            self.info = {**self.info, "api": api}
+        return changed
+
+    def update_video_info(self, video_info, resolution):
+        # probed from the file, so it replaces the resolution from the name
+        video_info = dict(video_info, resolution=sys.intern(resolution))
+        if isinstance(video_info.get("codec"), str):
+            video_info["codec"] = sys.intern(video_info["codec"])
+        with info_lock:
+            self.info = {**self.info, **video_info}
 
     def _update_api_dict(self, new_dict):
-        self.id = new_dict["id"]
-        self.info["api"] = {
-            "id": self.id,
+        api = {
+            "id": new_dict["id"],
             "genre_ids": new_dict["genre_ids"],
             "poster_path": new_dict["poster_path"],
         }
+        with info_lock:
+            self.info = {**self.info, "api": api}
 
     def _update_cast_dict(self, new_dict):
         # cast: name, id, popularity, order, character
@@ -105,10 +256,8 @@ class Movie:
                 director.append(person["name"])
             if person["job"] == "Screenplay" or person["job"] == "Dialogue":
                 screenplay.append(person["name"])
-        self.info["director"] = director[0]
-        self.info["screenplay"] = list(set(screenplay))
-        self.director = director[0]
-        self.screenplay = screenplay
+        director = people.intern(director[0]) if director else None
+        screenplay = [people.intern(name) for name in set(screenplay)]
         for person in new_dict["cast"]:
             if person["order"] > 4:
                 break
@@ -120,11 +269,29 @@ class Movie:
                 {"name": person["name"], "as": person["character"], "gender": gender}
             )
 
-        self.info["cast"] = cast
+        changes = {"director": director} if director else {}
+        changes["screenplay"] = screenplay
+        cast_ids = self._cast_ids(cast)
+        with info_lock:
+            self.cast_ids = cast_ids
+            self.info = {**self.info, **changes}
 
-    def _save_info_to_file(self):
-        with open(os.path.join(self.path, "tags.json"), "w", encoding="utf-8") as f:
-            json.dump(self.info, f, ensure_ascii=False, indent=4)
+    @staticmethod
+    def _cast_ids(cast):
+        return tuple(
+            (people.add(person["name"], person.get("gender")), person.get("as"))
+            for person in cast
+        )
+
+    @staticmethod
+    def _expand_cast(cast_ids):
+        if cast_ids is None:
+            return "-"
+        cast = []
+        for person_id, character in cast_ids:
+            name, gender = people.get(person_id)
+            cast.append({"name": name, "as": character, "gender": gender})
+        return cast
 
     def _get_poster_path(self):
         return os.path.join(self.path, "images", "poster.jpg")
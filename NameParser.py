@@ -0,0 +1,159 @@
+import os, re
+from functools import lru_cache
+
+NAME_CACHE_SIZE = 65536
+VIDEO_EXTENSIONS = {"mkv", "mp4", "avi", "m4v", "mov", "wmv", "mpg", "mpeg", "ts", "webm"}
+# every tag in one pass over the lowercased name. Splitting on it keeps the
+# text between the tags, so their positions come for free
+TAG_RE = re.compile(
+    r"""
+    (?<![0-9a-z'])(
+        (?:19|20)\d\d
+        |\d{3,4}[pi]|4k|uhd
+        |blu-?ray|bdrip|brrip|web-?dl|webrip|web|hdtv|dvdrip|dvd|hdrip|remux
+        |[xh]\.?26[45]|hevc|avc|xvid|divx|av1
+    )(?![0-9a-z'])
+    """,
+    re.VERBOSE,
+)
+ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+RESOLUTIONS = {"4k": "2160p", "uhd": "2160p"}
+SOURCES = {
+    "bluray": "BluRay",
+    "blu-ray": "BluRay",
+    "bdrip": "BDRip",
+    "brrip": "BRRip",
+    "web-dl": "WEB-DL",
+    "webdl": "WEB-DL",
+    "webrip": "WEBRip",
+    "web": "WEB",
+    "hdtv": "HDTV",
+    "dvdrip": "DVDRip",
+    "dvd": "DVD",
+    "hdrip": "HDRip",
+    "remux": "Remux",
+}
+CODECS = {
+    "x264": "H.264",
+    "h264": "H.264",
+    "h.264": "H.264",
+    "avc": "H.264",
+    "x265": "H.265",
+    "h265": "H.265",
+    "h.265": "H.265",
+    "hevc": "H.265",
+    "xvid": "XviD",
+    "divx": "DivX",
+    "av1": "AV1",
+}
+TAG_KINDS = {
+    **dict.fromkeys(RESOLUTIONS, "resolution"),
+    **dict.fromkeys(SOURCES, "source"),
+    **dict.fromkeys(CODECS, "codec"),
+}
+TITLE_STRIP = " ._-[("
+
+
+def is_video(name):
+    # the one list of video extensions, frames and probes use it too
+    _, dot, extension = name.rpartition(".")
+    return bool(dot) and extension.lower() in VIDEO_EXTENSIONS
+
+
+def parse_name(name):
+    # folder or file name -> title, year, resolution and, when the name
+    # has them, source, codec and release group
+    title, year, resolution, source, codec, group = _parse(name)
+    info = {"title": title, "year": year, "resolution": resolution}
+    if source:
+        info["source"] = source
+    if codec:
+        info["codec"] = codec
+    if group:
+        info["group"] = group
+    return info
+
+
+def parse_names(names):
+    # a whole directory listing, repeated names are parsed once
+    parsed = {}
+    for name in names:
+        if name not in parsed:
+            parsed[name] = parse_name(name)
+    return [dict(parsed[name]) for name in names]
+
+
+def parse_directory(path):
+    # entry name : info for everything in path
+    with os.scandir(path) as it:
+        names = [entry.name for entry in it]
+    return dict(zip(names, parse_names(names)))
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def _parse(name):
+    base, dot, extension = name.rpartition(".")
+    if not dot or extension.lower() not in VIDEO_EXTENSIONS:
+        base = name
+    # str.lower can change the length of non ascii names, the positions must hold
+    lowered = base.lower() if base.isascii() else base.translate(ASCII_LOWER)
+    parts = iter(TAG_RE.split(lowered))  # text, tag, text, tag, ..., text
+    year = year_start = late_year = tag_start = None
+    tags = {"resolution": None, "source": None, "codec": None}
+    position = len(next(parts))
+    for tag, text in zip(parts, parts):
+        start = position
+        position += len(tag) + len(text)
+        kind = TAG_KINDS.get(tag)
+        if kind is None:
+            if tag[-1] in "pi":
+                kind = "resolution"
+            else:
+                # the last year before the tags, a leading one belongs to
+                # the title (1917, 2001 A Space Odyssey)
+                if tag_start is None:
+                    if start > 0:
+                        year, year_start = int(tag), start
+                elif late_year is None:
+                    late_year = int(tag)
+                continue
+        if tag_start is None:
+            tag_start = start
+        if tags[kind] is None:
+            tags[kind] = tag
+
+    # the release group closes the name, Title.2014.1080p.x264-GROUP
+    group = None
+    rest, dash, name_end = base.rpartition("-")
+    if (
+        dash
+        and tag_start is not None
+        and len(rest) > tag_start
+        and name_end.isalnum()
+        and name_end.isascii()
+        and (rest[-1].isalnum() or rest[-1] == "]")
+    ):
+        group = name_end
+
+    if year is not None:
+        title_end = year_start
+    else:
+        title_end = tag_start if tag_start is not None else len(base)
+        year = late_year
+    title = base[:title_end]
+    if " " not in title.strip():
+        # dotted release names, dots inside spaced titles (Mr. Smith) stay
+        title = title.replace(".", " ").replace("_", " ")
+    title = " ".join(title.strip(TITLE_STRIP).split())
+    if not title:
+        title = " ".join(base.strip(TITLE_STRIP).split())
+
+    resolution = tags["resolution"]
+    return (
+        title,
+        year if year is not None else "unknown",
+        RESOLUTIONS.get(resolution, resolution) if resolution else "-",
+        tags["source"] and SOURCES[tags["source"]],
+        tags["codec"] and CODECS[tags["codec"]],
+        group,
+    )
@@ -0,0 +1,139 @@
+import tkinter as tk
+from tkinter import ttk
+from PIL import Image, ImageTk
+import webbrowser
+
+ROW_HEIGHT = 150
+OVERSCAN = 2  # rows built above and below the viewport
+
+
+class MovieRow:
+    # entry widgets reused for whichever movie scrolls into its slot
+    def __init__(self, view):
+        self.view = view
+        self.movie = None
+        self.photo = None
+        self.frame = ttk.Frame(view.canvas, borderwidth=2, relief="solid")
+        self.window = view.canvas.create_window(
+            (0, 0), window=self.frame, anchor="nw", height=ROW_HEIGHT - 4
+        )
+
+        self.image_label = tk.Label(self.frame)
+        self.image_label.pack(side="left")
+        self.title_label = tk.Label(
+            self.frame, font=("Arial", 15), anchor="nw", justify="left"
+        )
+        self.title_label.pack(anchor="nw", padx=10)
+        self.cast_label = tk.Label(self.frame, font=("Arial", 15))
+        self.cast_label.pack(anchor="nw", padx=10)
+        if view.imdb_icon is not None:
+            self.imdb_label = tk.Label(self.frame, image=view.imdb_icon)
+        else:
+            self.imdb_label = tk.Label(self.frame, text="imdb_link")
+        self.imdb_label.pack(anchor="e", padx=10)
+
+        for label in (self.image_label, self.title_label):
+            label.bind("<Button-1>", lambda _: view.on_open(self.movie.path))
+        self.imdb_label.bind(
+            "<Button-1>",
+            lambda _: webbrowser.open(
+                f"https://www.imdb.com/title/{self.movie.imdb_id}"
+            ),
+        )
+
+    def show(self, movie, row):
+        self.view.canvas.coords(self.window, 2, row * ROW_HEIGHT + 2)
+        self.view.canvas.itemconfigure(
+            self.window,
+            state="normal",
+            width=max(1, self.view.canvas.winfo_width() - 4),
+        )
+        if movie is self.movie:
+            return
+        self.movie = movie
+
+        # only loaded once the row is actually on screen
+        self.photo = self.view.thumbnails.get_photo(movie.get_image_path())
+        if self.photo is not None:
+            self.image_label.configure(image=self.photo, text="")
+        else:
+            self.image_label.configure(image="", text="No image")
+
+        text = f"{movie.title} ({movie.year})\n\nDirector:\t\t{movie.director}"
+        if len(movie.screenplay) > 0:
+            text += f"\nScreenplay:\t{', '.join(movie.screenplay)}"
+        self.title_label.configure(text=text)
+
+        if movie.cast_ids:
+            names = ", ".join(person["name"] for person in movie.cast[:2])
+            self.cast_label.configure(text=f"\nCast:\t\t{names}")
+        else:
+            self.cast_label.configure(text="")
+
+    def hide(self):
+        self.view.canvas.itemconfigure(self.window, state="hidden")
+
+
+class MovieListView:
+    # virtualized photo view, widgets exist only for rows near the viewport
+    def __init__(self, parent, thumbnails, on_open):
+        self.thumbnails = thumbnails
+        self.on_open = on_open
+        self.movies = []
+        self.rows: dict[int, MovieRow] = {}  # visible row index : widgets
+        self.free_rows: list[MovieRow] = []
+
+        self.canvas = tk.Canvas(parent, yscrollincrement=ROW_HEIGHT // 3)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        y_scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+        y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.configure(yscrollcommand=y_scrollbar.set)
+        self.canvas.bind("<Configure>", self._on_configure)
+
+        try:
+            imdb_icon = Image.open("resources/imdb_icon.png")
+            self.imdb_icon = ImageTk.PhotoImage(imdb_icon.resize((50, 50)))
+        except:
+            self.imdb_icon = None
+
+    def set_movies(self, movies):
+        self.movies = list(movies)
+        for row in self.rows.values():
+            row.movie = None
+            row.hide()
+            self.free_rows.append(row)
+        self.rows = {}
+        self.canvas.configure(
+            scrollregion=(0, 0, 0, len(self.movies) * ROW_HEIGHT)
+        )
+        self.canvas.yview_moveto(0)
+        self.refresh()
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def scroll(self, units):
+        self.canvas.yview_scroll(units, "units")
+        self.refresh()
+
+    def refresh(self):
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first = max(0, int(top // ROW_HEIGHT) - OVERSCAN)
+        last = min(len(self.movies), int(bottom // ROW_HEIGHT) + 1 + OVERSCAN)
+        visible = range(first, last)
+
+        for index in [index for index in self.rows if index not in visible]:
+            row = self.rows.pop(index)
+            row.hide()
+            self.free_rows.append(row)
+        for index in visible:
+            row = self.rows.get(index)
+            if row is None:
+                row = self.free_rows.pop() if self.free_rows else MovieRow(self)
+                self.rows[index] = row
+            row.show(self.movies[index], index)
+
+    def _on_configure(self, event):
+        self.refresh()
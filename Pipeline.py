@@ -0,0 +1,115 @@
+import threading, queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import Instrumentation
+from FolderManager import ENRICH_WORKERS
+
+
+class LibraryPipeline(threading.Thread):
+    # scan -> parse -> tmdb lookup -> poster -> credits, off the tk thread,
+    # a changed folder is enriched as soon as it's parsed.
+    # Progress goes through self.events as (kind, payload) tuples:
+    # scanned/enriching/removed/probed carry totals, parsed/enriched a folder name
+    # and done whether the run was cancelled
+    def __init__(self, folder_manager, workers=ENRICH_WORKERS, force=False):
+        super().__init__(daemon=True)
+        self.folder_manager = folder_manager
+        self.workers = workers
+        self.force = force
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.stages = [
+            lambda movie: movie.update_movie_info(force=self.force),
+            lambda movie: movie.update_poster(),
+            lambda movie: movie.update_details(force=self.force),
+        ]
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def run(self):
+        try:
+            enriched = []
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures, unmatched = self._parse(self.folder_manager.scan(), executor)
+                # lookups of movies tmdb didn't know wait for the changed ones
+                futures += [executor.submit(self._rematch, name) for name in unmatched]
+                self.events.put(("enriching", len(futures)))
+                for future in as_completed(futures):
+                    folder_name = future.result()
+                    if folder_name is not None:
+                        enriched.append(folder_name)
+            self.folder_manager.update_manifest(enriched)
+            if not self.cancelled():
+                probed = self.folder_manager.probe_videos()
+                self.events.put(("probed", len(probed)))
+                self.folder_manager.save_snapshot()
+            else:
+                self.folder_manager.save_new_info()
+        except Exception as e:
+            print(f"Library loading failed: {e}")
+        finally:
+            self.events.put(("done", self.cancelled()))
+
+    def _parse(self, entries, executor):
+        # movies restored from the snapshot stay as they are unless their
+        # folder changed, the ones tmdb didn't know are looked up again.
+        # Changed folders go to the executor right away. Returns their
+        # futures and the folders to look up
+        self.events.put(("scanned", len(entries)))
+        futures, unmatched, seen = [], [], set()
+        for entry in entries:
+            if self.cancelled():
+                return futures, unmatched
+            seen.add(entry.name)
+            try:
+                folder_name, movie, changed = self.folder_manager.load_movie(entry)
+            except OSError as e:
+                print(f"Couldn't load {entry.name}: {e}")
+                continue
+            seen.add(folder_name)
+            self.folder_manager.add_movie(folder_name, movie, enriched=not changed)
+            self.events.put(("parsed", folder_name))
+            if changed or self.force:
+                futures.append(executor.submit(self._enrich, folder_name))
+            elif movie.id == "-":
+                unmatched.append(folder_name)
+        removed = self.folder_manager.remove_missing(seen)
+        self.events.put(("removed", len(removed)))
+        return futures, unmatched
+
+    def _rematch(self, folder_name):
+        # the rest of the stages only run once tmdb finds the movie
+        movie = self.folder_manager.movies.get(folder_name)
+        if movie is None or self.cancelled():
+            return None
+        try:
+            movie.update_movie_info()
+        except Exception as e:
+            print(f"Couldn't update {movie.title}: {e}")
+        if movie.id == "-":
+            return None
+        return self._enrich(folder_name)
+
+    def _enrich(self, folder_name):
+        movie = self.folder_manager.movies.get(folder_name)
+        if movie is None:
+            return None
+        with Instrumentation.span("enrich movie"):
+            for stage in self.stages:
+                if self.cancelled():
+                    return None
+                try:
+                    stage(movie)
+                except Exception as e:
+                    # what the earlier stages got is kept, the folder is
+                    # enriched again on the next run
+                    print(f"Couldn't update {movie.title}: {e}")
+                    self.folder_manager.movie_updated(movie)
+                    self.folder_manager.enrich_failed([folder_name])
+                    return None
+        self.folder_manager.movie_updated(movie)
+        self.events.put(("enriched", folder_name))  # while parsing still goes on
+        return folder_name
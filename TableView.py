@@ -0,0 +1,94 @@
+import tkinter as tk
+from tkinter import ttk
+
+PAGE_SIZE = 500  # rows inserted at once, more follow as the user scrolls
+LOAD_MORE_AT = 0.9
+
+
+def _sort_key(value):
+    # numbers before text before missing values
+    if isinstance(value, (int, float)):
+        return (0, value, "")
+    if value is None:
+        return (2, 0, "")
+    return (1, 0, str(value).lower())
+
+
+class MovieTable:
+    # treeview filled in pages, with sort keys computed once per column
+    def __init__(self, parent):
+        self.rows = []  # tuples of displayable values, in display order
+        self.columns = []
+        self.sort_keys = {}  # column : keys aligned with self.rows
+        self.sorted_by = None
+        self.inserted = 0
+
+        self.y_scrollbar = ttk.Scrollbar(parent)
+        self.y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        x_scrollbar = ttk.Scrollbar(parent, orient=tk.HORIZONTAL)
+        x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+
+        self.tree = ttk.Treeview(
+            parent,
+            yscrollcommand=self._on_yscroll,
+            xscrollcommand=x_scrollbar.set,
+        )
+        self.y_scrollbar.config(command=self.tree.yview)
+        x_scrollbar.config(command=self.tree.xview)
+        self.tree.column("#0", width=0, stretch=tk.NO)  # Hide the first column
+        self.tree.pack(fill="both", expand=True)
+
+    def set_movies(self, movies):
+        infos = [movie.displayable_info() for movie in movies]
+        columns = {"title": None}
+        for info in infos:
+            columns.update(dict.fromkeys(info))
+        self._set_columns(list(columns) if infos else [])
+        self.rows = [tuple(info.get(col, "") for col in self.columns) for info in infos]
+        self.sort_keys = {}
+        self.sorted_by = None
+        self._reload()
+
+    def sort_by(self, column):
+        reverse = self.sorted_by == (column, False)
+        if column not in self.sort_keys:
+            i = self.columns.index(column)
+            self.sort_keys[column] = [_sort_key(row[i]) for row in self.rows]
+        keys = self.sort_keys[column]
+        order = sorted(range(len(self.rows)), key=keys.__getitem__, reverse=reverse)
+        self.rows = [self.rows[i] for i in order]
+        for col, col_keys in self.sort_keys.items():
+            self.sort_keys[col] = [col_keys[i] for i in order]
+        self.sorted_by = (column, reverse)
+        self._reload()
+
+    def _set_columns(self, columns):
+        if columns == self.columns:
+            return
+        self.columns = columns
+        self.tree["columns"] = columns
+        for col in columns:
+            self.tree.column(col, anchor=tk.W, width=100)
+            self.tree.heading(
+                col, text=col, anchor=tk.W, command=lambda col=col: self.sort_by(col)
+            )
+
+    def _reload(self):
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self.inserted = 0
+        self._insert_page()
+
+    def _insert_page(self):
+        end = min(self.inserted + PAGE_SIZE, len(self.rows))
+        insert = self.tree.insert
+        for row in self.rows[self.inserted : end]:
+            insert("", tk.END, values=row)
+        self.inserted = end
+
+    def _on_yscroll(self, first, last):
+        self.y_scrollbar.set(first, last)
+        if float(last) >= LOAD_MORE_AT and self.inserted < len(self.rows):
+            self._insert_page()
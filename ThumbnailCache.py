@@ -0,0 +1,71 @@
+import os, hashlib
+from collections import OrderedDict
+from PIL import Image, ImageTk
+
+THUMBNAIL_DIR = "thumbnails"
+THUMBNAIL_HEIGHT = 128
+MEMORY_SIZE = 500  # ready photo images kept between renders
+
+
+class ThumbnailCache:
+    # scaled copies on disk, invalidated by the source mtime, and an lru of
+    # photo images in memory so re-rendering decodes nothing
+    def __init__(
+        self, folder=THUMBNAIL_DIR, height=THUMBNAIL_HEIGHT, max_items=MEMORY_SIZE
+    ):
+        self.folder = folder
+        self.height = height
+        self.max_items = max_items
+        self.photos = OrderedDict()  # (source path, mtime) : PhotoImage
+        os.makedirs(folder, exist_ok=True)
+
+    def get_photo(self, source_path):
+        # must be called from the tk main loop
+        try:
+            key = (source_path, os.stat(source_path).st_mtime_ns)
+        except (OSError, TypeError):
+            return None
+        photo = self.photos.get(key)
+        if photo is not None:
+            self.photos.move_to_end(key)
+            return photo
+        image = self.get_image(source_path, key[1])
+        if image is None:
+            return None
+        photo = ImageTk.PhotoImage(image)
+        self.photos[key] = photo
+        while len(self.photos) > self.max_items:
+            self.photos.popitem(last=False)
+        return photo
+
+    def get_image(self, source_path, source_mtime=None):
+        if source_mtime is None:
+            source_mtime = os.stat(source_path).st_mtime_ns
+        thumbnail_path = self._thumbnail_path(source_path)
+        try:
+            if os.stat(thumbnail_path).st_mtime_ns >= source_mtime:
+                with Image.open(thumbnail_path) as image:
+                    image.load()
+                    return image
+        except OSError:
+            pass
+        try:
+            return self._create_thumbnail(source_path, thumbnail_path)
+        except OSError as e:
+            print(f"Couldn't create thumbnail for {source_path}: {e}")
+            return None
+
+    def _create_thumbnail(self, source_path, thumbnail_path):
+        with Image.open(source_path) as image:
+            width = max(1, int(self.height * image.width / image.height))
+            # lets the jpeg decoder skip most of the full size image
+            image.draft("RGB", (width, self.height))
+            thumbnail = image.convert("RGB").resize((width, self.height))
+        tmp_path = f"{thumbnail_path}.tmp"
+        thumbnail.save(tmp_path, "JPEG", quality=90)
+        os.replace(tmp_path, thumbnail_path)
+        return thumbnail
+
+    def _thumbnail_path(self, source_path):
+        name = hashlib.sha1(os.path.abspath(source_path).encode()).hexdigest()
+        return os.path.join(self.folder, f"{name}_{self.height}.jpg")
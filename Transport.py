@@ -0,0 +1,148 @@
+import os, json, time, random, hashlib, threading
+from io import BytesIO
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import requests
+from requests.adapters import HTTPAdapter, BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+FIXTURE_DIR = "fixtures"
+SECRET_PARAMS = ("api_key",)  # never written to fixtures or used in their names
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+
+
+def fixture_url(url):
+    # the url without secrets and with sorted params, the same for every run
+    parts = urlsplit(url)
+    params = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in SECRET_PARAMS
+    )
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{parts.scheme}://{parts.netloc}{parts.path}{query}"
+
+
+def fixture_name(method, url):
+    return hashlib.sha1(f"{method} {fixture_url(url)}".encode()).hexdigest()
+
+
+def save_fixture(folder, method, url, status, headers, body):
+    # <name>.json holds the status and headers, <name>.body the raw body
+    os.makedirs(folder, exist_ok=True)
+    name = fixture_name(method, url)
+    meta = {
+        "method": method,
+        "url": fixture_url(url),
+        "status": status,
+        "headers": {key: headers[key] for key in KEPT_HEADERS if key in headers},
+    }
+    body_path = os.path.join(folder, f"{name}.body")
+    with open(f"{body_path}.tmp", "wb") as f:
+        f.write(body)
+    os.replace(f"{body_path}.tmp", body_path)
+    meta_path = os.path.join(folder, f"{name}.json")
+    with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+
+def load_fixture(folder, method, url):
+    name = fixture_name(method, url)
+    try:
+        with open(os.path.join(folder, f"{name}.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(folder, f"{name}.body"), "rb") as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return None
+    return meta, body
+
+
+class RecordingAdapter(HTTPAdapter):
+    # talks to the real servers and writes every successful response to folder
+    def __init__(self, folder=FIXTURE_DIR, **kwargs):
+        super().__init__(**kwargs)
+        self.folder = folder
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if response.status_code in (200, 404):
+            # reading content here still lets the caller iterate over it
+            save_fixture(
+                self.folder,
+                request.method,
+                request.url,
+                response.status_code,
+                response.headers,
+                response.content,
+            )
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    # serves recorded responses without touching the network. latency is
+    # seconds per request (plus up to jitter more), error_rate and
+    # rate_limit_rate are the chances of a connection error or a 429
+    def __init__(
+        self,
+        folder=FIXTURE_DIR,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        rate_limit_rate=0.0,
+        retry_after=0,
+        seed=None,
+    ):
+        super().__init__()
+        self.folder = folder
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0, "missing": 0}
+
+    def send(self, request, stream=False, timeout=None, **kwargs):
+        with self.lock:
+            self.stats["requests"] += 1
+            roll = self.random.random()
+            delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        if roll < self.error_rate:
+            self._count("errors")
+            raise requests.ConnectionError(f"Injected error for {fixture_url(request.url)}")
+        if roll < self.error_rate + self.rate_limit_rate:
+            self._count("rate_limited")
+            return self._response(request, 429, {"Retry-After": str(self.retry_after)}, b"")
+
+        fixture = load_fixture(self.folder, request.method, request.url)
+        if fixture is None:
+            self._count("missing")
+            return self._response(request, 404, {}, b"")
+        meta, body = fixture
+        headers = meta["headers"]
+        etag = headers.get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            return self._response(request, 304, headers, b"")
+        return self._response(request, meta["status"], headers, body)
+
+    def close(self):
+        pass
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _response(self, request, status, headers, body):
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.raw = BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.reason = "Replayed"
+        response.encoding = "utf-8"
+        return response
@@ -0,0 +1,113 @@
+import os, json, threading
+from NameParser import CODECS, is_video
+
+PROBE_CACHE_FILE = "probe_cache.json"
+PROBE_WORKERS = 8  # opencv releases the gil while opening files
+# container fourccs on top of the name tags, so a probed codec reads the
+# same as one parsed from the folder name
+FOURCC_CODECS = {
+    **CODECS,
+    "avc1": "H.264",
+    "avc3": "H.264",
+    "hev1": "H.265",
+    "hvc1": "H.265",
+    "dx50": "DivX",
+    "div3": "DivX",
+    "av01": "AV1",
+}
+
+
+def probe_file(path):
+    import cv2  # loading opencv costs more than a warm probe
+
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        return None
+    try:
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+    finally:
+        cap.release()
+    codec = "".join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4)).strip("\0 ")
+    return {
+        "width": width,
+        "height": height,
+        "fps": round(fps, 3),
+        "duration": round(frame_count / fps / 60) if fps > 0 else 0,  # minutes
+        "codec": codec or "-",
+    }
+
+
+def codec_name(fourcc):
+    # unknown fourccs are kept as they are
+    return FOURCC_CODECS.get(fourcc.lower(), fourcc)
+
+
+def resolution_name(width, height):
+    # widescreen films are letterboxed, so the width decides as well.
+    # None when the container doesn't report a frame size
+    if width <= 0 or height <= 0:
+        return None
+    if width >= 3800 or height >= 2100:
+        return "2160p"
+    if width >= 1900 or height >= 1060:
+        return "1080p"
+    if width >= 1260 or height >= 700:
+        return "720p"
+    return f"{height}p"
+
+
+def find_video(folder_path):
+    # the largest video is the movie, the rest are samples and extras
+    videos = []
+    try:
+        with os.scandir(folder_path) as it:
+            for entry in it:
+                if entry.is_file() and is_video(entry.name):
+                    videos.append((entry.stat().st_size, entry.path))
+    except OSError:
+        return None
+    return max(videos)[1] if videos else None
+
+
+class ProbeCache:
+    # path : size, mtime and probe result, so a file is only probed once
+    def __init__(self, path=PROBE_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.dirty = False
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def probe(self, video_path):
+        stat = os.stat(video_path)
+        with self.lock:
+            entry = self.entries.get(video_path)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+            return entry["probe"]
+        result = probe_file(video_path)
+        with self.lock:
+            self.entries[video_path] = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "probe": result,
+            }
+            self.dirty = True
+        return result
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            data = json.dumps(self.entries, ensure_ascii=False)
+            self.dirty = False
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,145 @@
+import os, sys, time, json, shutil, tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+import ApiController, Transport
+from MovieInfo import Movie
+
+WORKERS = [1, 4, 8, 16]
+POSTER_BYTES = 30_000  # about the size of a w185 jpeg
+
+
+def prepared_url(url, params=None):
+    return requests.Request("GET", url, params=params).prepare().url
+
+
+def make_fixtures(folder, n):
+    # what tmdb would answer for n movies, so the run needs no network
+    for i in range(n):
+        title, year = f"Movie {i}", 1950 + i % 70
+        search = {
+            "results": [
+                {
+                    "id": i,
+                    "title": title,
+                    "release_date": f"{year}-01-01",
+                    "genre_ids": [18],
+                    "poster_path": f"/p{i}.jpg",
+                }
+            ]
+        }
+        details = {
+            "id": i,
+            "credits": {
+                "crew": [{"job": "Director", "name": f"Director {i % 500}"}],
+                "cast": [
+                    {
+                        "name": f"Actor {(i + j) % 3000}",
+                        "character": f"Role {j}",
+                        "order": j,
+                        "gender": 2,
+                    }
+                    for j in range(8)
+                ],
+            },
+            "external_ids": {"imdb_id": f"tt{i:07d}"},
+        }
+        json_headers = {"Content-Type": "application/json"}
+        Transport.save_fixture(
+            folder,
+            "GET",
+            prepared_url(
+                f"{ApiController.API_URL}/search/movie",
+                {"include_adult": "true", "query": title},
+            ),
+            200,
+            json_headers,
+            json.dumps(search).encode(),
+        )
+        Transport.save_fixture(
+            folder,
+            "GET",
+            prepared_url(
+                f"{ApiController.API_URL}/movie/{i}",
+                {"append_to_response": "credits,external_ids"},
+            ),
+            200,
+            json_headers,
+            json.dumps(details).encode(),
+        )
+        Transport.save_fixture(
+            folder,
+            "GET",
+            f"{ApiController.IMAGE_URL}/{ApiController.POSTER_SIZE}/p{i}.jpg",
+            200,
+            {"Content-Type": "image/jpeg", "ETag": f'"{i}"'},
+            bytes(POSTER_BYTES),
+        )
+
+
+def make_movies(library, n):
+    movies = []
+    for i in range(n):
+        path = os.path.join(library, f"Movie {i} ({1950 + i % 70})")
+        os.makedirs(path, exist_ok=True)
+        movies.append(Movie({"title": f"Movie {i}", "year": 1950 + i % 70, "path": path}))
+    return movies
+
+
+def enrich(movies, workers, force=False):
+    def update(movie):
+        try:
+            movie.update_movie(force=force)
+        except Exception as e:
+            print(f"Couldn't update {movie.title}: {e}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(update, movies))
+    return time.perf_counter() - start
+
+
+def bench(n, latency, rate_limit_rate, rate):
+    root = tempfile.mkdtemp(prefix="bench_enrich_")
+    try:
+        fixtures = os.path.join(root, "fixtures")
+        make_fixtures(fixtures, n)
+        for workers in WORKERS:
+            adapter = Transport.ReplayAdapter(
+                fixtures,
+                latency=latency,
+                jitter=latency / 2,
+                rate_limit_rate=rate_limit_rate,
+                seed=0,
+            )
+            client = ApiController.use_transport(
+                adapter,
+                api_key="replay",
+                cache=ApiController.ResponseCache(path=None),
+                misses=ApiController.ResponseCache(path=None),
+                limiter=ApiController.RateLimiter(rate=rate),
+            )
+            movies = make_movies(os.path.join(root, f"library{workers}"), n)
+            cold = enrich(movies, workers)
+            requests_made = adapter.stats["requests"]
+            warm = enrich(movies, workers, force=True)
+            missing = sum(movie.imdb_id == "-" for movie in movies)
+            print(
+                f"{n:>6} movies  {workers:>2} workers  cold {cold:6.2f}s  "
+                f"warm {warm:6.2f}s  requests {requests_made:>6}  "
+                f"429s {adapter.stats['rate_limited']:>4}  not enriched {missing}"
+            )
+            client.cache.clear()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # bench_enrich.py [movies] [latency seconds] [429 rate] [requests per second]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    rate_limit_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    rate = float(sys.argv[4]) if len(sys.argv) > 4 else ApiController.RATE_LIMIT
+    bench(n, latency, rate_limit_rate, rate)
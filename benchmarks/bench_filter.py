@@ -0,0 +1,69 @@
+import os, sys, time, random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MovieInfo import Movie
+from MovieIndex import MovieIndex, filter_movies
+
+WORDS = "the dark night return king lost city of blue river last man star war road house".split()
+DIRECTORS = ["Christopher Nolan", "Ridley Scott", "Sofia Coppola", "Bong Joon-ho", "-"]
+RESOLUTIONS = ["1080p", "720p", "2160p", "-"]
+QUERIES = [
+    ("year", "greater than", "2015"),
+    ("year", "less than", "1960"),
+    ("year", "equals", "1999"),
+    ("year", "contains", "99"),
+    ("title", "contains", "night"),
+    ("title", "contains", "ki"),
+    ("director", "contains", "nolan"),
+    ("resolution", "equals", "1080p"),
+]
+
+
+def make_movies(n, seed=0):
+    rnd = random.Random(seed)
+    movies = {}
+    for i in range(n):
+        info = {
+            "title": " ".join(rnd.choices(WORDS, k=rnd.randint(1, 4))).title(),
+            "year": rnd.randint(1930, 2024),
+            "resolution": rnd.choice(RESOLUTIONS),
+            "director": rnd.choice(DIRECTORS),
+        }
+        movies[f"{info['title']} ({info['year']}) {i}"] = Movie(info)
+    return movies
+
+
+def bench(n, repeat=20):
+    movies = make_movies(n)
+    values = list(movies.values())
+    index = MovieIndex()
+    index.rebuild(movies)
+    print(f"{n} movies")
+    for query in QUERIES:
+        start = time.perf_counter()
+        index.query(*query)  # first query of a field builds its index
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            linear = filter_movies(values, *query)
+        linear_time = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            indexed = index.query(*query)
+        indexed_time = (time.perf_counter() - start) / repeat
+
+        assert indexed == linear, query
+        print(
+            f"  {' '.join(query):<30} {len(linear):>7} hits  "
+            f"linear {linear_time * 1000:8.2f} ms  "
+            f"indexed {indexed_time * 1000:8.2f} ms  "
+            f"(build {build * 1000:.1f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    for n in [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]:
+        bench(n)
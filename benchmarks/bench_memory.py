@@ -0,0 +1,72 @@
+import os, sys, time, json, random, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MovieInfo import Movie
+from bench_filter import WORDS, DIRECTORS, RESOLUTIONS
+
+PEOPLE = 5000  # distinct actors and writers the casts are drawn from
+
+
+def make_infos(n, seed=0):
+    # json strings, so every movie gets its own string objects like a catalog load
+    rnd = random.Random(seed)
+    names = [f"{rnd.choice(WORDS).title()} {rnd.choice(WORDS).title()}son {i}" for i in range(PEOPLE)]
+    infos = []
+    for i in range(n):
+        title = " ".join(rnd.choices(WORDS, k=rnd.randint(1, 4))).title()
+        year = rnd.randint(1930, 2024)
+        info = {
+            "title": title,
+            "year": year,
+            "resolution": rnd.choice(RESOLUTIONS),
+            "path": f"/movies/{title} ({year})",
+            "width": 1920,
+            "height": 1080,
+            "fps": 23.976,
+            "duration": rnd.randint(80, 180),
+            "codec": rnd.choice(["h264", "hevc", "xvid"]),
+            "api": {
+                "id": i,
+                "genre_ids": rnd.sample(range(10, 40), 3),
+                "poster_path": f"/{i:08x}.jpg",
+                "imdb_id": f"tt{i:07d}",
+            },
+            "director": rnd.choice(DIRECTORS),
+            "screenplay": rnd.sample(names, 2),
+            "cast": [
+                {"name": name, "as": f"Character {j}", "gender": rnd.choice(["Male", "Female"])}
+                for j, name in enumerate(rnd.sample(names, 5))
+            ],
+        }
+        infos.append(json.dumps(info))
+    return infos
+
+
+def bench(n):
+    infos = make_infos(n)
+    start = time.perf_counter()
+    movies = [Movie(json.loads(info)) for info in infos]
+    build = time.perf_counter() - start
+    del movies
+
+    tracemalloc.start()
+    movies = [Movie(json.loads(info)) for info in infos]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for movie in movies:
+        movie.displayable_info()
+    display = time.perf_counter() - start
+    print(
+        f"{n:>7} movies  {size / 2**20:8.1f} MiB  {size / n:7.0f} B/movie  "
+        f"build {build:6.2f}s  displayable_info {display * 1000:7.1f} ms"
+    )
+    return size
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000]
+    for n in sizes:
+        bench(n)
@@ -0,0 +1,105 @@
+import os, re, sys, json, time, random
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import NameParser
+from library import make_titles, release_name, RESOLUTIONS
+
+CORPUS_FILE = os.path.join(BENCH_DIR, "name_corpus.json")
+MIN_ACCURACY = 1.0  # the corpus is small enough to keep fully correct
+FIELDS = ("title", "year", "resolution", "source", "codec", "group")
+
+
+def legacy_parse(file_name):
+    # FolderManager._get_info_from_name before NameParser, kept for comparison
+    year_match = re.search(r"(?:^|\D)(19\d{2}|20\d{2})(?:\D|$)", file_name)
+    if year_match:
+        year = int(year_match.group(1))
+    else:
+        year = "unknown"
+    parts = re.split(r" \(|\.|\[", file_name)
+    match = re.search(r"^(.*?)[ ]*(?=\d{4})", file_name)
+    if match:
+        parts2 = match.group(1)
+    else:
+        parts2 = file_name
+    if len(parts[0]) < len(parts2):
+        title = parts[0]
+    else:
+        title = parts2
+    res = re.search(r"\[(.*?)\]", file_name)
+    if res:
+        res = res.group(1)
+    else:
+        res = "-"
+    return {"title": title, "year": year, "resolution": res}
+
+
+def generated_corpus(n, seed=0):
+    # the naming styles of the synthetic libraries, with known answers
+    rnd = random.Random(seed)
+    corpus = []
+    for i, (title, year) in enumerate(make_titles(n, seed)):
+        res = rnd.choice(RESOLUTIONS)
+        names = [
+            f"{title.replace(' ', '.')}.{year}.[{res}]",
+            f"{title} ({year}) [{res}].mkv",
+            release_name(title, year, rnd),
+            f"{title} ({year})",
+        ]
+        corpus.append({"name": names[i % len(names)], "title": title, "year": year})
+    return corpus
+
+
+def accuracy(parse, corpus):
+    # share of names with every expected field right, and the misses
+    misses = []
+    for entry in corpus:
+        info = parse(entry["name"])
+        if any(info.get(field) != entry[field] for field in FIELDS if field in entry):
+            misses.append((entry["name"], info))
+    return 1 - len(misses) / len(corpus), misses
+
+
+def speed(parsers, names, repeat=7):
+    # best of repeat, alternating the parsers so they see the same machine load
+    best = {label: float("inf") for label in parsers}
+    for _ in range(repeat):
+        for label, parse in parsers.items():
+            NameParser._parse.cache_clear()
+            start = time.perf_counter()
+            for name in names:
+                parse(name)
+            best[label] = min(best[label], time.perf_counter() - start)
+    return {label: seconds / len(names) * 1e6 for label, seconds in best.items()}
+
+
+def main():
+    with open(CORPUS_FILE, encoding="utf-8") as f:
+        corpus = json.load(f)
+    generated = generated_corpus(10_000)
+
+    for label, entries in (("corpus", corpus), ("generated", generated)):
+        for name, parse in (("legacy", legacy_parse), ("NameParser", NameParser.parse_name)):
+            score, misses = accuracy(parse, entries)
+            print(f"{label:<10} {name:<11} accuracy {score:7.1%}  ({len(misses)} wrong)")
+
+    names = [entry["name"] for entry in generated]
+    speeds = speed({"legacy": legacy_parse, "parse_name cold": NameParser.parse_name}, names)
+    for label, us in speeds.items():
+        print(f"{label:<17} {us:6.2f} us/name")
+    start = time.perf_counter()
+    NameParser.parse_names(names)
+    warm = (time.perf_counter() - start) / len(names) * 1e6
+    print(f"parse_names warm  {warm:6.2f} us/name")
+
+    score, misses = accuracy(NameParser.parse_name, corpus)
+    for name, info in misses:
+        print(f"wrong: {name!r} -> {info}")
+    if score < MIN_ACCURACY:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import os, sys, shutil, tempfile, subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from Catalog import Catalog
+from DataFilterApp import FIRST_WINDOW_BUDGET
+from FolderManager import FolderManager
+from MovieInfo import people
+from Pipeline import LibraryPipeline
+from library import make_library
+from run_benchmarks import offline_api, quietly, timed
+
+# a fresh interpreter opening the app, prints the seconds to the first paint
+FIRST_WINDOW = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {repo!r})
+import tkinter as tk
+try:
+    root = tk.Tk()
+except tk.TclError as e:
+    print("skipped:", e)
+    sys.exit()
+from DataFilterApp import DataFilterApp
+app = DataFilterApp(root)
+root.update()
+print(time.perf_counter() - start)
+app.pipeline.cancel()
+"""
+
+
+def fake_enrich(fm):
+    # what tmdb would have added, so the snapshot is as big as a real one
+    movies = fm.get_movies()
+    for i, movie in enumerate(movies):
+        movie._update_api_dict({"id": i, "genre_ids": [18, 35], "poster_path": None})
+        movie._update_cast_dict(
+            {
+                "crew": [{"job": "Director", "name": f"Director {i % 2000}"}],
+                "cast": [
+                    {
+                        "name": f"Actor {(i * 7 + j) % 20000}",
+                        "character": f"Role {j}",
+                        "order": j,
+                        "gender": 2,
+                    }
+                    for j in range(5)
+                ],
+            }
+        )
+        movie.info["api"]["imdb_id"] = f"tt{i:07d}"
+    fm._movies_updated(movies)
+
+
+def load(library, snapshot):
+    # a new process has an empty person table
+    people.__init__()
+    fm = FolderManager(library, scan=False, catalog=Catalog(), snapshot=snapshot)
+    fm.load_catalog()
+    return fm
+
+
+def first_window(folder):
+    output = subprocess.run(
+        [sys.executable, "-c", FIRST_WINDOW.format(repo=REPO_DIR)],
+        cwd=folder,
+        capture_output=True,
+        text=True,
+    ).stdout.strip().splitlines()
+    if not output or output[-1].startswith("skipped"):
+        return None, output[-1] if output else "no output"
+    return float(output[-1]), None
+
+
+def bench(n):
+    cwd = os.getcwd()
+    folder = tempfile.mkdtemp(prefix="bench_startup_")
+    try:
+        os.chdir(folder)  # the app opens catalog.db in the working directory
+        offline_api(folder)
+        library = os.path.join(folder, "library")
+        make_library(library, n)
+        fm = FolderManager(library, scan=False, catalog=Catalog())
+        quietly(fm.create_movies)
+        fake_enrich(fm)
+        seconds, _ = timed(fm.save_snapshot)
+        size = os.path.getsize(fm.catalog.snapshot_path())
+        print(f"{n} movies, snapshot {size / 2**20:.1f} MiB written in {seconds * 1000:.0f} ms")
+
+        seconds, fm = timed(load, library, False)
+        print(f"catalog load      {seconds * 1000:8.1f} ms  {len(fm.movies)} movies")
+        seconds, fm = timed(load, library, True)
+        print(f"snapshot load     {seconds * 1000:8.1f} ms  {len(fm.movies)} movies")
+
+        # nothing changed on disk, so reconciling mustn't write a single row
+        generation = fm.catalog.generation()
+        pipeline = LibraryPipeline(fm)
+        seconds, _ = timed(quietly, pipeline.run)
+        written = fm.catalog.generation() - generation
+        print(f"reconcile         {seconds * 1000:8.1f} ms  {written} catalog writes")
+
+        seconds, skipped = first_window(folder)
+        if seconds is None:
+            print(f"first window      {skipped}")
+            return True
+        print(f"first window      {seconds * 1000:8.1f} ms  budget {FIRST_WINDOW_BUDGET * 1000:.0f} ms")
+        return seconds <= FIRST_WINDOW_BUDGET
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # bench_startup.py [movies], fails when the first window is over budget
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    if not bench(n):
+        sys.exit(1)
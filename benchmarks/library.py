@@ -0,0 +1,102 @@
+import os, random
+
+WORDS = (
+    "the dark night return king lost city of blue river last man star war road "
+    "house silent winter garden iron moon shadow storm glass empire heart fire "
+    "secret island long way home black white summer broken stone"
+).split()
+RESOLUTIONS = ["1080p", "720p", "2160p", "480p"]
+SOURCES = ["BluRay", "WEB-DL", "WEBRip", "HDTV", "DVDRip"]
+CODECS = ["x264", "x265", "H.264", "HEVC", "XviD"]
+GROUPS = ["GRP", "SPARKS", "YTS", "RARBG", "FGT"]
+VIDEO_EXTENSIONS = [".mkv", ".mp4", ".avi"]
+STYLES = ["folder", "bare", "nested", "clean"]
+
+
+def make_titles(n, seed=0):
+    # n distinct (title, year) pairs
+    rnd = random.Random(seed)
+    titles = set()
+    while len(titles) < n:
+        title = " ".join(rnd.choices(WORDS, k=rnd.randint(1, 4))).title()
+        titles.add((title, rnd.randint(1930, 2024)))
+    return sorted(titles, key=lambda _: rnd.random())
+
+
+def release_name(title, year, rnd):
+    return ".".join(
+        [
+            title.replace(" ", "."),
+            str(year),
+            rnd.choice(RESOLUTIONS),
+            rnd.choice(SOURCES),
+            f"{rnd.choice(CODECS)}-{rnd.choice(GROUPS)}",
+        ]
+    )
+
+
+def make_library(root, n, seed=0, videos=0, posters=0):
+    # n movies in the styles the folder manager meets in the wild:
+    #   folder  Title.2014.[1080p]/Title.2014.[1080p].mkv
+    #   bare    Title (2014) [720p].mp4, a file straight in the library
+    #   nested  Title.2014.1080p.BluRay.x264-GRP/ with the video and a Sample/
+    #   clean   Title (2014)/
+    # The first `videos` movies get a real, tiny video and the first `posters`
+    # a poster. Returns (entry name, title, year) for every movie
+    rnd = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    movies = []
+    for i, (title, year) in enumerate(make_titles(n, seed)):
+        style = STYLES[i % len(STYLES)]
+        ext = rnd.choice(VIDEO_EXTENSIONS)
+        res = rnd.choice(RESOLUTIONS)
+        if style == "folder":
+            name = f"{title.replace(' ', '.')}.{year}.[{res}]"
+            folder = os.path.join(root, name)
+            video = os.path.join(folder, f"{name}{ext}")
+        elif style == "bare":
+            name = f"{title} ({year}) [{res}]{ext}"
+            folder = None
+            video = os.path.join(root, name)
+        elif style == "nested":
+            name = release_name(title, year, rnd)
+            folder = os.path.join(root, name)
+            video = os.path.join(folder, f"{name}{ext}")
+            os.makedirs(os.path.join(folder, "Sample"))
+            _touch(os.path.join(folder, "Sample", f"sample{ext}"))
+        else:
+            name = f"{title} ({year})"
+            folder = os.path.join(root, name)
+            video = os.path.join(folder, f"{title}{ext}")
+        if folder is not None:
+            os.makedirs(folder, exist_ok=True)
+        if i < videos:
+            make_video(video)
+        else:
+            _touch(video)
+        if i < posters and folder is not None:
+            make_poster(os.path.join(folder, "images", "poster.jpg"))
+        movies.append((name, title, year))
+    return movies
+
+
+def make_video(path, seconds=2, fps=10, size=(160, 90)):
+    import cv2, numpy as np
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for i in range(seconds * fps):
+        frame = np.full((size[1], size[0], 3), (i * 7) % 255, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+
+
+def make_poster(path, size=(185, 278)):
+    from PIL import Image
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new("RGB", size, (40, 60, 90)).save(path, quality=80)
+
+
+def _touch(path):
+    with open(path, "wb"):
+        pass
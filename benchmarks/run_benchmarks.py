@@ -0,0 +1,216 @@
+import os, io, sys, json, time, shutil, platform, argparse, tempfile, statistics
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import ApiController, Transport, NameParser, Instrumentation
+from Catalog import Catalog
+from FolderManager import FolderManager
+from library import make_library
+from bench_filter import QUERIES
+
+SIZES = [1_000, 10_000, 100_000]
+REPEAT = 5
+VIDEOS = 20  # movies with a real video for save_images, decoding dominates
+
+
+class Results:
+    # every measurement is one flat record, so runs can be diffed and plotted
+    def __init__(self):
+        self.records = []
+        self.metrics = {}  # size : spans and counters of the instrumented pass
+
+    def add(self, name, size, seconds=None, **extra):
+        record = {"name": name, "size": size, "seconds": seconds, **extra}
+        self.records.append(record)
+        if seconds is None:
+            print(f"{name:<36} {size:>7}  skipped: {extra.get('skipped')}")
+        else:
+            print(f"{name:<36} {size:>7}  {seconds * 1000:10.2f} ms")
+
+    def to_dict(self):
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": self.records,
+            # collected in a separate run with instrumentation on, never timed
+            "instrumented_pass": self.metrics,
+        }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def quietly(fn, *args, **kwargs):
+    # the folder manager prints a line for every movie tmdb doesn't know
+    with redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def offline_api(root):
+    # no fixtures, so every lookup is an instant 404 and only our code is timed
+    ApiController.use_transport(
+        Transport.ReplayAdapter(os.path.join(root, "fixtures")),
+        api_key="bench",
+        cache=ApiController.ResponseCache(path=None),
+        misses=ApiController.ResponseCache(path=None),
+        limiter=ApiController.RateLimiter(rate=1e9),
+    )
+
+
+def bench_parse(fm, names, size, results):
+    times = []
+    for _ in range(REPEAT):
+        NameParser._parse.cache_clear()  # create_movies already parsed them
+        times.append(timed(lambda: [fm._get_info_from_name(name) for name in names])[0])
+    seconds = statistics.median(times)
+    results.add("_get_info_from_name", size, seconds, per_name_us=seconds / size * 1e6)
+
+
+def bench_create_movies(library, db_path, size, results):
+    fm = FolderManager(library, scan=False, catalog=Catalog(db_path))
+    seconds, _ = timed(quietly, fm.create_movies)
+    results.add("create_movies.cold", size, seconds, movies=len(fm.movies))
+    seconds, _ = timed(fm.save_new_info)
+    results.add("save_new_info", size, seconds)
+
+    fm = FolderManager(library, scan=False, catalog=Catalog(db_path))
+    seconds, _ = timed(quietly, fm.create_movies)
+    results.add("create_movies.warm", size, seconds, movies=len(fm.movies))
+    return fm
+
+
+def bench_filter(fm, size, results):
+    for field, method, value in QUERIES:
+        first, hits = timed(fm.apply_filter, field, method, value)
+        times = [timed(fm.apply_filter, field, method, value)[0] for _ in range(REPEAT)]
+        results.add(
+            f"apply_filter[{field} {method} {value}]",
+            size,
+            statistics.median(times),
+            first=first,
+            hits=len(hits),
+        )
+
+
+def bench_save_images(root, videos, results):
+    library = os.path.join(root, "videos")
+    make_library(library, videos, seed=1, videos=videos)
+    catalog = Catalog(os.path.join(root, "videos.db"))
+    fm = FolderManager(library, scan=False, catalog=catalog)
+    quietly(fm.create_movies)
+    seconds, timings = timed(quietly, fm.save_images)
+    frames = sum(frames for frames, _ in timings.values())
+    results.add("save_images", videos, seconds, frames=frames)
+
+
+def bench_display(fm, root, size, results):
+    import tkinter as tk
+
+    try:
+        tk_root = tk.Tk()
+    except tk.TclError as e:
+        results.add("display_filtered_data", size, skipped=str(e))
+        return
+    from DataFilterApp import DataFilterApp
+    from ThumbnailCache import ThumbnailCache
+
+    # the app without its startup pipeline, dialogs and watcher
+    app = DataFilterApp.__new__(DataFilterApp)
+    app.root = tk_root
+    app.folder_manager = fm
+    app.directory = fm.path
+    app.movies = fm.get_movies()
+    app.current_query = fm.get_movies
+    app.thumbnails = ThumbnailCache(os.path.join(root, "thumbnails"))
+    app.create_widgets()
+    tk_root.update()
+    try:
+        for tab in app.notebook.tabs():
+            app.notebook.select(tab)
+            tk_root.update()
+            app.displayed = None
+
+            def display():
+                app.display_filtered_data(app.movies)
+                tk_root.update()
+
+            seconds, _ = timed(display)
+            repeat, _ = timed(display)  # same movies, nothing to redo
+            name = app.notebook.tab(tab, "text").strip().lower().replace(" ", "_")
+            results.add(f"display_filtered_data[{name}]", size, seconds, unchanged=repeat)
+    finally:
+        tk_root.destroy()
+
+
+def collect_metrics(library, db_path, names, size, results):
+    # the scan, parse and filter paths once more with spans and counters on.
+    # Nothing here is timed, the timings above ran with instrumentation off
+    Instrumentation.reset()
+    Instrumentation.enable()
+    try:
+        fm = FolderManager(library, scan=False, catalog=Catalog(db_path))
+        quietly(fm.create_movies)
+        for name in names:
+            fm._get_info_from_name(name)
+        for field, method, value in QUERIES:
+            fm.apply_filter(field, method, value)
+        results.metrics[str(size)] = Instrumentation.snapshot()
+    finally:
+        Instrumentation.enable(False)
+    print(f"instrumented pass for {size} movies collected (not timed)")
+
+
+def run(sizes, videos, display):
+    results = Results()
+    cwd = os.getcwd()
+    root = tempfile.mkdtemp(prefix="movies_bench_")
+    try:
+        os.chdir(root)  # catalog, caches and thumbnails stay in the temp dir
+        offline_api(root)
+        for size in sizes:
+            folder = os.path.join(root, str(size))
+            library = os.path.join(folder, "library")
+            seconds, movies = timed(make_library, library, size)
+            print(f"generated {size} movies in {seconds:.1f}s")
+            db_path = os.path.join(folder, "catalog.db")
+            names = [name for name, _, _ in movies]
+            fm = bench_create_movies(library, db_path, size, results)
+            bench_parse(fm, names, size, results)
+            bench_filter(fm, size, results)
+            if display:
+                bench_display(fm, folder, size, results)
+            collect_metrics(library, db_path, names, size, results)
+            shutil.rmtree(folder, ignore_errors=True)
+        if videos:
+            bench_save_images(root, videos, results)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the scan, filter and render paths")
+    parser.add_argument("sizes", nargs="*", type=int, default=SIZES)
+    parser.add_argument(
+        "--videos", type=int, default=VIDEOS, help="movies for save_images, 0 skips it"
+    )
+    parser.add_argument("--no-display", action="store_true", help="skip the tk benchmarks")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+    Instrumentation.enable(False)  # even with MOVIES_METRICS set, see collect_metrics
+    results = run(args.sizes, args.videos, not args.no_display)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results.to_dict(), f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()